@@ -1,4 +1,4 @@
 from .database import Base, engine, AsyncSessionLocal, get_db, create_tables
-from .models.activity import Activity
+from .models.activity import Activity, activity_closure
 from .models.building import Building
 from .models.company import Company, company_activity, CompanyPhone
\ No newline at end of file
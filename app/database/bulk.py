@@ -0,0 +1,78 @@
+from uuid import uuid4
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Iterable, List, Sequence, Tuple
+from sqlalchemy import Table, column, func, insert, select, table, text
+
+
+async def allocate_ids(db: AsyncSession, target: Table, count: int) -> List[int]:
+    """Забирает count значений из последовательности id таблицы"""
+    if count <= 0:
+        return []
+    result = await db.scalars(
+        select(func.nextval(func.pg_get_serial_sequence(target.name, "id")))
+        .select_from(func.generate_series(1, count))
+    )
+    return result.all()
+
+
+async def copy_records(
+    db: AsyncSession,
+    table_name: str,
+    columns: Sequence[str],
+    records: Iterable[Tuple[Any, ...]]
+):
+    """Загрузка строк через COPY FROM STDIN в текущей транзакции сессии.
+
+    Для драйверов без COPY строки вставляются обычным executemany.
+    """
+    records = list(records)
+    if not records:
+        return
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    driver = raw.driver_connection
+    if hasattr(driver, "copy_records_to_table"):
+        try:
+            await driver.copy_records_to_table(table_name, records=records, columns=list(columns))
+        except Exception as e:
+            # COPY идёт мимо SQLAlchemy: ошибка оборачивается так же, как у обычного запроса
+            raise DBAPIError.instance(f"COPY {table_name}", None, e, Exception) from e
+        return
+    target = table(table_name, *(column(name) for name in columns))
+    await db.execute(insert(target), [dict(zip(columns, record)) for record in records])
+
+
+async def create_staging_table(db: AsyncSession, target: Table, columns: Sequence[str]):
+    """Временная таблица с колонками target, удаляется при коммите"""
+    staging_name = f"staging_{target.name}_{uuid4().hex[:8]}"
+    await db.execute(text(
+        f'CREATE TEMP TABLE "{staging_name}" ON COMMIT DROP AS '
+        f'SELECT {", ".join(columns)} FROM "{target.name}" WITH NO DATA'
+    ))
+    return table(staging_name, *(column(name) for name in columns))
+
+
+async def load_via_staging(
+    db: AsyncSession,
+    target: Table,
+    columns: Sequence[str],
+    records: Iterable[Tuple[Any, ...]]
+) -> int:
+    """COPY во временную таблицу и один INSERT ... SELECT в target.
+
+    Ограничения и внешние ключи target проверяются на последнем шаге,
+    поэтому ошибка откатывает всю пачку целиком.
+    """
+    records = list(records)
+    if not records:
+        return 0
+    staging = await create_staging_table(db, target, columns)
+    await copy_records(db, staging.name, columns, records)
+    result = await db.execute(
+        insert(target).from_select(
+            list(columns),
+            select(*(staging.c[name] for name in columns))
+        )
+    )
+    return result.rowcount
@@ -1,20 +1,35 @@
+from sqlalchemy import DDL, event
 from sqlalchemy.orm import declarative_base
 from app.config.config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
+from app.config import config
+from app.monitoring.metrics import InstrumentedPool
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 
 
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DATABASE_URL = config.DATABASE_URL or \
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# asyncpg готовит запросы заранее, и после пяти выполнений Postgres может
+# перейти на общий план без учёта параметров; для поиска по ILIKE и
+# координатам такой план бывает на порядок медленнее
 engine = create_async_engine(DATABASE_URL, 
+    poolclass=InstrumentedPool,
     pool_size=10,
     max_overflow=20,
+    connect_args={"server_settings": {"plan_cache_mode": "force_custom_plan"}},
     echo=False
 )
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
 Base = declarative_base()
 
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
 
 async def create_tables():
     async with engine.begin() as conn:
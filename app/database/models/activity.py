@@ -1,20 +1,38 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 from app.database.models.company import company_activity
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, Index
+
+
+activity_closure = Table(
+    'activity_closure',
+    Base.metadata,
+    Column('ancestor_id', Integer, ForeignKey('activities.id', ondelete='CASCADE'), primary_key=True),
+    Column('descendant_id', Integer, ForeignKey('activities.id', ondelete='CASCADE'), primary_key=True),
+    Column('depth', Integer, nullable=False, comment="Расстояние от предка до потомка"),
+    Index('ix_activity_closure_descendant_id', 'descendant_id'),
+)
+
 
 class Activity(Base):
     __tablename__ = "activities"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, comment="Назание деятельности")
-    parent_id = Column(Integer, ForeignKey("activities.id"), nullable=True)
+    parent_id = Column(Integer, ForeignKey("activities.id"), nullable=True, index=True)
     
     parent = relationship("Activity", remote_side=[id], back_populates="children")
     children = relationship("Activity", back_populates="parent")
     companies = relationship(
         "Company", 
         secondary=company_activity,
-        back_populates="activities",
-        lazy="selectin"
-    )
\ No newline at end of file
+        back_populates="activities"
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_activities_name_trgm", "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 
@@ -10,4 +10,8 @@ class Building(Base):
     latitude = Column(Float, nullable=False, comment="Широта")
     longitude = Column(Float, nullable=False, comment="Долгота")
     
-    companies = relationship("Company", back_populates="building")
\ No newline at end of file
+    companies = relationship("Company", back_populates="building")
+
+    __table_args__ = (
+        Index("ix_buildings_latitude_longitude", "latitude", "longitude"),
+    )
\ No newline at end of file
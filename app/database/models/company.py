@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 
@@ -6,8 +6,9 @@ from app.database.database import Base
 company_activity = Table(
     'company_activity',
     Base.metadata,
-    Column('company_id', Integer, ForeignKey('companies.id')),
-    Column('activity_id', Integer, ForeignKey('activities.id'))
+    Column('company_id', Integer, ForeignKey('companies.id'), primary_key=True),
+    Column('activity_id', Integer, ForeignKey('activities.id'), primary_key=True),
+    Index('ix_company_activity_activity_id_company_id', 'activity_id', 'company_id'),
 )
 
 
@@ -16,18 +17,26 @@ class Company(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, comment="Название компании")
-    building_id = Column(Integer, ForeignKey("buildings.id"))
+    building_id = Column(Integer, ForeignKey("buildings.id"), index=True)
     
-    building = relationship("Building", back_populates="companies", lazy="selectin")
-    activities = relationship("Activity", secondary=company_activity, back_populates="companies", lazy="selectin")
-    phones = relationship("CompanyPhone", back_populates="company",  lazy="selectin")
+    building = relationship("Building", back_populates="companies")
+    activities = relationship("Activity", secondary=company_activity, back_populates="companies")
+    phones = relationship("CompanyPhone", back_populates="company")
+
+    __table_args__ = (
+        Index(
+            "ix_companies_name_trgm", "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+    )
 
 
 class CompanyPhone(Base):
     __tablename__ = "company_phones"
 
     id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
     phone_number = Column(String, nullable=False, comment="Номер телефона")
     
     company = relationship("Company", back_populates="phones")
\ No newline at end of file
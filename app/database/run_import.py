@@ -0,0 +1,31 @@
+import sys
+import asyncio
+import logging
+import argparse
+from app.database import AsyncSessionLocal
+from app.services.company import CompanyService
+from app.services.company_import import ImportFormat, IMPORT_BATCH_SIZE
+
+
+async def run_import(path: str, fmt: ImportFormat, batch_size: int = IMPORT_BATCH_SIZE):
+    async with AsyncSessionLocal() as db:
+        with open(path, encoding="utf-8-sig", newline="") as file:
+            return await CompanyService().import_companies(db, file, fmt, batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовый импорт компаний из CSV или NDJSON")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=[fmt.value for fmt in ImportFormat])
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    fmt = ImportFormat(args.format) if args.format else ImportFormat.from_filename(args.path)
+    report = asyncio.run(run_import(args.path, fmt, args.batch_size))
+    print(report.model_dump_json(indent=2))
+    sys.exit(1 if report.rejected_count else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,158 +1,211 @@
+import math
+import random
 import asyncio
+import argparse
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterator, List, Optional, Tuple
 from app.database.models.activity import Activity
 from app.database.models.building import Building
-from app.database.models.company import Company, CompanyPhone
+from app.database.models.company import Company, CompanyPhone, company_activity
+from app.database.bulk import allocate_ids, copy_records
 from app.database import AsyncSessionLocal
+from app.services.activity import ActivityService, MAX_ACTIVITY_LEVEL
+from app.services.geo import EARTH_RADIUS_KM
+from app.services.cache import response_cache
 
-async def seed_data():
+
+SEED_BATCH_SIZE = 50_000
+
+# Центр, разброс застройки в км и относительный вес города
+CITIES = [
+    ("Москва", 55.7558, 37.6173, 15.0, 13.0),
+    ("Санкт-Петербург", 59.9386, 30.3141, 12.0, 5.6),
+    ("Новосибирск", 55.0302, 82.9204, 9.0, 1.6),
+    ("Екатеринбург", 56.8380, 60.5973, 8.0, 1.5),
+    ("Казань", 55.7964, 49.1089, 8.0, 1.3),
+    ("Нижний Новгород", 56.3269, 44.0059, 8.0, 1.2),
+    ("Красноярск", 56.0106, 92.8526, 7.0, 1.2),
+    ("Самара", 53.1951, 50.1069, 7.0, 1.2),
+    ("Владивосток", 43.1155, 131.8855, 6.0, 0.6),
+    ("Калининград", 54.7104, 20.4522, 5.0, 0.5),
+]
+
+STREETS = [
+    "ул. Ленина", "пр. Мира", "ул. Пушкина", "ул. Гагарина", "пр. Ленинградский",
+    "ул. Советская", "ул. Садовая", "ул. Лесная", "ул. Школьная", "ул. Набережная",
+    "ул. Молодёжная", "ул. Центральная", "ул. Заводская", "пр. Победы", "ул. Строителей",
+]
+
+ACTIVITY_NAMES = {
+    "IT и технологии": ["Разработка ПО", "Веб-разработка", "Мобильная разработка", "Кибербезопасность"],
+    "Торговля": ["Розничная торговля", "Оптовая торговля", "Интернет-магазин"],
+    "Услуги": ["Юридические услуги", "Консалтинг", "Образовательные услуги", "Медицинские услуги"],
+    "Производство": ["Пищевая промышленность", "Машиностроение", "Легкая промышленность"],
+    "Транспорт": ["Грузоперевозки", "Такси", "Логистика"],
+    "Строительство": ["Жилое строительство", "Ремонт", "Проектирование"],
+}
+
+NAME_PREFIXES = [
+    "Техно", "Мега", "Юр", "Прогресс", "Мед", "Пром", "Гранд", "Строй", "Евро", "Сити",
+    "Агро", "Инфо", "Транс", "Альфа", "Эко", "Вектор", "Спектр", "Гео", "Сиб", "Нева",
+]
+NAME_SUFFIXES = [
+    "Софт", "Маркет", "Консалт", "Тех", "Сервис", "Торг", "Строй", "Лаб", "Групп", "Трейд",
+    "Логистик", "Плюс", "Центр", "Систем", "Инвест", "Медиа", "Проект", "Снаб", "Дизайн", "Мир",
+]
+
+
+class SeedParams(BaseModel):
+    """Параметры генератора тестовых данных"""
+    buildings: int = Field(100, ge=1, le=10_000_000)
+    companies: int = Field(1000, ge=0, le=50_000_000)
+    activity_roots: int = Field(4, ge=1, le=1000)
+    activity_depth: int = Field(MAX_ACTIVITY_LEVEL, ge=1, le=MAX_ACTIVITY_LEVEL)
+    activity_fanout: int = Field(4, ge=1, le=100)
+    activities_per_company: int = Field(3, ge=1, le=20)
+    phones_per_company: int = Field(2, ge=0, le=20)
+    seed: int = 42
+
+
+class DemoSeedParams(SeedParams):
+    """Параметры генератора для HTTP: объёмы как у демо-набора, крупные наборы - только через CLI"""
+    buildings: int = Field(100, ge=1, le=1000)
+    companies: int = Field(1000, ge=0, le=10_000)
+    activity_roots: int = Field(4, ge=1, le=20)
+
+
+def generate_activities(rng: random.Random, params: SeedParams) -> List[Tuple[str, Optional[int]]]:
+    """Дерево видов деятельности в порядке обхода в ширину: (название, индекс родителя)"""
+    root_names = list(ACTIVITY_NAMES)
+    activities = [
+        (root_names[i] if i < len(root_names) else f"Отрасль {i + 1}", None)
+        for i in range(params.activity_roots)
+    ]
+    level = list(range(len(activities)))
+    for _ in range(params.activity_depth - 1):
+        next_level = []
+        for parent in level:
+            parent_name = activities[parent][0]
+            known = ACTIVITY_NAMES.get(parent_name, [])
+            for i in range(rng.randint(max(1, params.activity_fanout // 2), params.activity_fanout)):
+                name = known[i] if i < len(known) else f"{parent_name}: направление {i + 1}"
+                next_level.append(len(activities))
+                activities.append((name, parent))
+        level = next_level
+    return activities
+
+
+def random_point(rng: random.Random) -> Tuple[float, float, str]:
+    city = rng.choices(CITIES, weights=[city[4] for city in CITIES])[0]
+    _, lat, lng, spread_km, _ = city
+    distance = abs(rng.gauss(0, spread_km))
+    bearing = rng.uniform(0, 2 * math.pi)
+    delta_lat = math.degrees(distance * math.cos(bearing) / EARTH_RADIUS_KM)
+    delta_lng = math.degrees(distance * math.sin(bearing) / EARTH_RADIUS_KM) / math.cos(math.radians(lat))
+    return round(lat + delta_lat, 6), round(lng + delta_lng, 6), city[0]
+
+
+def generate_buildings(rng: random.Random, count: int) -> Iterator[Tuple[str, float, float]]:
+    """Точки зданий и улица без номера дома: номером станет id здания"""
+    for _ in range(count):
+        lat, lng, city = random_point(rng)
+        yield f"г. {city}, {rng.choice(STREETS)}", lat, lng
+
+
+def random_phone(rng: random.Random) -> str:
+    return "+7-9{:02d}-{:03d}-{:02d}-{:02d}".format(
+        rng.randrange(100), rng.randrange(1000), rng.randrange(100), rng.randrange(100)
+    )
+
+
+def chunked(items: Iterator, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def seed_data(params: Optional[SeedParams] = None) -> Dict[str, int]:
+    """Детерминированная (по seed) генерация справочника с загрузкой через COPY"""
+    params = params or SeedParams()
+    rng = random.Random(params.seed)
     async with AsyncSessionLocal() as db:
-        activities_data = [
-            {"name": "IT и технологии", "parent_id": None},
-            {"name": "Торговля", "parent_id": None},
-            {"name": "Услуги", "parent_id": None},
-            {"name": "Производство", "parent_id": None},
-            
-            {"name": "Разработка ПО", "parent_id": 1},
-            {"name": "Веб-разработка", "parent_id": 1},
-            {"name": "Мобильная разработка", "parent_id": 1},
-            {"name": "Кибербезопасность", "parent_id": 1},
-            
-            {"name": "Розничная торговля", "parent_id": 2},
-            {"name": "Оптовая торговля", "parent_id": 2},
-            {"name": "Интернет-магазин", "parent_id": 2},
-            
-            {"name": "Юридические услуги", "parent_id": 3},
-            {"name": "Консалтинг", "parent_id": 3},
-            {"name": "Образовательные услуги", "parent_id": 3},
-            {"name": "Медицинские услуги", "parent_id": 3},
-            
-            {"name": "Пищевая промышленность", "parent_id": 4},
-            {"name": "Машиностроение", "parent_id": 4},
-            {"name": "Легкая промышленность", "parent_id": 4},
-        ]
-        
-        activities = []
-        for activity_data in activities_data:
-            activity = Activity(**activity_data)
-            db.add(activity)
-            activities.append(activity)
-        
+        activities = generate_activities(rng, params)
+        activity_ids = await allocate_ids(db, Activity.__table__, len(activities))
+        await copy_records(db, Activity.__tablename__, ("id", "name", "parent_id"), [
+            (activity_id, name, None if parent is None else activity_ids[parent])
+            for activity_id, (name, parent) in zip(activity_ids, activities)
+        ])
         await db.commit()
-        
-        buildings_data = [
-            {
-                "address": "ул. Ленина, д. 10",
-                "latitude": 55.7558,
-                "longitude": 37.6173
-            },
-            {
-                "address": "пр. Мира, д. 25",
-                "latitude": 55.7818,
-                "longitude": 37.6327
-            },
-            {
-                "address": "ул. Пушкина, д. 5",
-                "latitude": 55.7654,
-                "longitude": 37.6056
-            },
-            {
-                "address": "ул. Гагарина, д. 15",
-                "latitude": 55.7412,
-                "longitude": 37.6259
-            },
-            {
-                "address": "пр. Ленинградский, д. 40",
-                "latitude": 55.7964,
-                "longitude": 37.5355
-            }
-        ]
-        
-        buildings = []
-        for building_data in buildings_data:
-            building = Building(**building_data)
-            db.add(building)
-            buildings.append(building)
-        
-        await db.commit()
-        
-        companies_data = [
-            {
-                "name": "ТехноСофт",
-                "building_id": buildings[0].id,
-                "activity_ids": [5, 6],  # Разработка ПО, Веб-разработка
-                "phones": ["+7-999-123-45-67", "+7-495-123-45-67"]
-            },
-            {
-                "name": "МегаМаркет",
-                "building_id": buildings[1].id,
-                "activity_ids": [9, 11],  # Розничная торговля, Интернет-магазин
-                "phones": ["+7-999-234-56-78"]
-            },
-            {
-                "name": "ЮрКонсалт",
-                "building_id": buildings[2].id,
-                "activity_ids": [12],  # Юридические услуги
-                "phones": ["+7-495-234-56-78", "+7-999-345-67-89"]
-            },
-            {
-                "name": "ПрогрессТех",
-                "building_id": buildings[3].id,
-                "activity_ids": [17],  # Машиностроение
-                "phones": ["+7-499-345-67-89"]
-            },
-            {
-                "name": "ИТРешения",
-                "building_id": buildings[0].id,
-                "activity_ids": [5, 7, 8],  # Разработка ПО, Мобильная разработка, Кибербезопасность
-                "phones": ["+7-495-456-78-90"]
-            },
-            {
-                "name": "Учебный Центр",
-                "building_id": buildings[4].id,
-                "activity_ids": [14],  # Образовательные услуги
-                "phones": ["+7-499-567-89-01", "+7-999-456-78-90"]
-            },
-            {
-                "name": "МедСервис",
-                "building_id": buildings[2].id,
-                "activity_ids": [15],  # Медицинские услуги
-                "phones": ["+7-495-678-90-12"]
-            },
-            {
-                "name": "ПромТорг",
-                "building_id": buildings[1].id,
-                "activity_ids": [10],  # Оптовая торговля
-                "phones": ["+7-499-789-01-23"]
-            }
-        ]
-        
-        for company_data in companies_data:
-            result = await db.execute(
-                Activity.__table__.select().where(Activity.id.in_(company_data["activity_ids"]))
-            )
-            company_activities = result.fetchall()
-            
-            company = Company(
-                name=company_data["name"],
-                building_id=company_data["building_id"]
+        await ActivityService.rebuild_closure(db)
+
+        building_ids = []
+        for chunk in chunked(generate_buildings(rng, params.buildings), SEED_BATCH_SIZE):
+            ids = await allocate_ids(db, Building.__table__, len(chunk))
+            await copy_records(db, Building.__tablename__, ("id", "address", "latitude", "longitude"), [
+                (building_id, f"{street}, д. {building_id}", lat, lng)
+                for building_id, (street, lat, lng) in zip(ids, chunk)
+            ])
+            await db.commit()
+            building_ids.extend(ids)
+
+        phones_count = await seed_companies(db, rng, params, building_ids, activity_ids)
+        await response_cache.invalidate(
+            Activity.__tablename__, Building.__tablename__, Company.__tablename__
+        )
+
+        return {
+            "Виды деятельности": len(activity_ids),
+            "Здания": len(building_ids),
+            "Компании": params.companies,
+            "Телефоны": phones_count
+        }
+
+
+async def seed_companies(
+    db: AsyncSession,
+    rng: random.Random,
+    params: SeedParams,
+    building_ids: List[int],
+    activity_ids: List[int]
+) -> int:
+    phones_count = 0
+    for start in range(0, params.companies, SEED_BATCH_SIZE):
+        size = min(SEED_BATCH_SIZE, params.companies - start)
+        ids = await allocate_ids(db, Company.__table__, size)
+        companies, phones, links = [], [], []
+        for number, company_id in enumerate(ids, start + 1):
+            # Квадрат равномерной величины: в первых зданиях компаний заметно больше
+            building_id = building_ids[int(len(building_ids) * rng.random() ** 2)]
+            name = f"{rng.choice(NAME_PREFIXES)}{rng.choice(NAME_SUFFIXES)} {number}"
+            companies.append((company_id, name, building_id))
+            phones.extend(
+                (company_id, random_phone(rng))
+                for _ in range(rng.randint(min(1, params.phones_per_company), params.phones_per_company))
             )
-            
-            for activity_id in company_data["activity_ids"]:
-                activity = next((a for a in activities if a.id == activity_id), None)
-                if activity:
-                    company.activities.append(activity)
-            
-            for phone in company_data["phones"]:
-                company_phone = CompanyPhone(phone_number=phone)
-                company.phones.append(company_phone)
-            
-            db.add(company)
-        
+            count = rng.randint(1, min(params.activities_per_company, len(activity_ids)))
+            links.extend((company_id, activity_id) for activity_id in rng.sample(activity_ids, count))
+
+        await copy_records(db, Company.__tablename__, ("id", "name", "building_id"), companies)
+        await copy_records(db, CompanyPhone.__tablename__, ("company_id", "phone_number"), phones)
+        await copy_records(db, company_activity.name, ("company_id", "activity_id"), links)
         await db.commit()
-        
-        return {
-            "Виды деятельности": len(activities),
-            "Здания": len(buildings),
-            "Компании": len(companies_data)
-        }
\ No newline at end of file
+        phones_count += len(phones)
+    return phones_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация тестовых данных справочника")
+    for name, field in SeedParams.model_fields.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=field.default)
+    params = SeedParams(**vars(parser.parse_args()))
+    print(asyncio.run(seed_data(params)))
+
+
+if __name__ == "__main__":
+    main()
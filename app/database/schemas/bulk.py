@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Any, Generic, List, TypeVar
+
+
+ItemT = TypeVar("ItemT")
+
+
+class BulkItemError(BaseModel):
+    index: int
+    detail: Any
+
+
+class BulkResult(BaseModel, Generic[ItemT]):
+    items: List[ItemT]
+    errors: List[BulkItemError] = []
+
+
+class BulkDeleteResult(BaseModel):
+    deleted: List[int]
+    errors: List[BulkItemError] = []
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from typing import Annotated, Any, List, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
 from .building import Building
 from .activity import Activity
 
@@ -34,4 +34,107 @@ class Company(CompanyBase):
 
 class CompanyWithRelations(Company):
     building: Building
-    activities: List[Activity]
\ No newline at end of file
+    activities: List[Activity]
+
+
+class CompanyWithDistance(CompanyWithRelations):
+    distance: float
+
+
+class CompanySearch(BaseModel):
+    """Фильтры комбинированного поиска, заданные фильтры объединяются через AND"""
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    radius: Optional[float] = None
+    activity_id: Optional[int] = None
+    activity_name: Optional[str] = None
+    building_id: Optional[int] = None
+    name: Optional[str] = None
+
+    @property
+    def location(self) -> Optional[tuple]:
+        if self.lat is None and self.lng is None and self.radius is None:
+            return None
+        return self.lat, self.lng, self.radius
+
+
+class ActivityFacet(BaseModel):
+    id: int
+    name: str
+    count: int
+
+
+class BuildingFacet(BaseModel):
+    id: int
+    address: str
+    count: int
+
+
+class GeoCellFacet(BaseModel):
+    """Ячейка сетки, lat/lng - её юго-западный угол"""
+    lat: float
+    lng: float
+    size: float
+    count: int
+
+
+class GeoCluster(BaseModel):
+    """Ячейка сетки с организациями: lat/lng - центр масс зданий с учётом числа организаций"""
+    lat: float
+    lng: float
+    count: int
+    buildings: int
+    cell_lat: float
+    cell_lng: float
+    size: float
+
+
+class CompanyFacets(BaseModel):
+    """Число найденных организаций в разрезе поддеревьев деятельности, зданий и ячеек сетки"""
+    total: int
+    activities: Optional[List[ActivityFacet]] = None
+    buildings: Optional[List[BuildingFacet]] = None
+    cells: Optional[List[GeoCellFacet]] = None
+
+
+LIST_SEPARATOR = ";"
+# Ключи таблиц - integer PostgreSQL; больший id не найти, а запрос с ним падает
+RowId = Annotated[int, Field(ge=1, le=2_147_483_647)]
+
+
+class CompanyImportRow(BaseModel):
+    """Строка импорта: здание по id или адресу, виды деятельности по id или названию.
+
+    В CSV списки передаются одной ячейкой через точку с запятой.
+    """
+    name: str = Field(min_length=1)
+    building_id: Optional[RowId] = None
+    building_address: Optional[str] = None
+    phone_numbers: List[str] = []
+    activity_ids: List[RowId] = []
+    activity_names: List[str] = []
+
+    @field_validator("phone_numbers", "activity_ids", "activity_names", mode="before")
+    @classmethod
+    def split_list(cls, value):
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+        return value
+
+    @model_validator(mode="after")
+    def check_building(self):
+        if self.building_id is None and not self.building_address:
+            raise ValueError("building_id or building_address is required")
+        return self
+
+
+class ImportRejectedRow(BaseModel):
+    line: int
+    detail: Any
+
+
+class ImportReport(BaseModel):
+    total: int = 0
+    imported: int = 0
+    rejected_count: int = 0
+    rejected: List[ImportRejectedRow] = []
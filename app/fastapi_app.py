@@ -1,9 +1,20 @@
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.openapi.utils import get_openapi
+from app.database.database import AsyncSessionLocal, engine
+from app.monitoring.queries import QueryStatsMiddleware, configure_query_log, install_query_hooks
+from app.monitoring import metrics
+from app.routers.caching import ResponseCacheMiddleware
+from app.services.auth import verify_api_key, verify_metrics_key
+from app.services.activity import ActivityService
+from app.services.taxonomy import taxonomy_cache
 from app.routers.activity import ActivityRouter
 from app.routers.building import BuildingRouter
 from app.routers.company import CompanyRouter
-from app.database.run_mock import seed_data
+from app.database.run_mock import seed_data, DemoSeedParams
+from app.services.exceptions import ActivityNotFound, \
+     ActivityDepthExceeded, ActivityCycleDetected, InvalidCursor, InvalidSearchFilters
 
 
 app = FastAPI(
@@ -35,16 +46,41 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+configure_query_log()
+install_query_hooks(engine)
+metrics.register_pool_metrics(engine)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ResponseCacheMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.on_event("startup")
+async def load_activity_taxonomy():
+    async with AsyncSessionLocal() as db:
+        await ActivityService.ensure_closure(db)
+        await taxonomy_cache.load(db)
+
+@app.exception_handler(ActivityNotFound)
+async def activity_not_found_handler(request: Request, exc: ActivityNotFound):
+    return JSONResponse(status_code=404, content={"detail": str(exc)})
+
+@app.exception_handler(ActivityDepthExceeded)
+@app.exception_handler(ActivityCycleDetected)
+@app.exception_handler(InvalidCursor)
+@app.exception_handler(InvalidSearchFilters)
+async def bad_request_handler(request: Request, exc: Exception):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 @app.get("/")
 def read_root():
     return {"message": "Company Directory API"}
 
-@app.post("/")
-async def create_mock_data():
-    try:
-        return await seed_data()
-    except Exception as e:
-        return {"error": str(e)}
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_key)])
+def read_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.post("/", dependencies=[Depends(verify_api_key)])
+async def create_mock_data(params: Optional[DemoSeedParams] = None):
+    return await seed_data(params)
 
 app.include_router(ActivityRouter().get_router())
 app.include_router(BuildingRouter().get_router())
@@ -0,0 +1,75 @@
+"""Привязка базы, созданной до Alembic, к истории миграций.
+
+    python -m app.migrations.stamp
+
+Раньше схема создавалась через create_all или ревизией, которую
+docker-compose автогенерировал при каждом запуске, поэтому в таких базах нет
+alembic_version или в ней записана неизвестная ревизия, и alembic upgrade head
+падает. Скрипт по существующим объектам определяет последнюю применённую
+ревизию, досоздаёт объекты базовой ревизии, которых до Alembic не было, и
+записывает ревизию через alembic stamp. Пустую базу и базу с известной
+ревизией не меняет.
+"""
+import os
+import asyncio
+from typing import Optional, Set
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.database.database import engine
+from app.database.models.activity import activity_closure
+from app.database.models.building import Building
+
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+# Объект, который появляется в ревизии; от новых ревизий к старым
+REVISION_MARKERS = (
+    ("5c2d8e41f0a7", "ix_activities_parent_id"),
+    ("11f789e5decb", "ix_companies_name_trgm"),
+    ("b06c479079b9", "companies"),
+)
+
+
+async def relation_exists(conn: AsyncConnection, name: str) -> bool:
+    return (await conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})).scalar_one()
+
+
+async def detect_revision(known: Set[str]) -> Optional[str]:
+    """Ревизия для записи в alembic_version или None, если записывать нечего"""
+    try:
+        async with engine.begin() as conn:
+            if await relation_exists(conn, "alembic_version"):
+                current = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars().all()
+                if current and set(current) <= known:
+                    return None
+            for revision, marker in REVISION_MARKERS:
+                if await relation_exists(conn, marker):
+                    break
+            else:
+                return None
+            # Базовая ревизия уже содержит замыкание дерева и индекс по
+            # координатам, а в базах до Alembic их нет
+            await conn.run_sync(activity_closure.create, checkfirst=True)
+            for index in Building.__table__.indexes:
+                await conn.run_sync(index.create, checkfirst=True)
+            return revision
+    finally:
+        await engine.dispose()
+
+
+def main():
+    config = Config(ALEMBIC_INI)
+    known = {script.revision for script in ScriptDirectory.from_config(config).walk_revisions()}
+    revision = asyncio.run(detect_revision(known))
+    if revision is None:
+        print("stamp not needed")
+        return
+    print(f"stamp {revision}")
+    command.stamp(config, revision, purge=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Add company_activity primary key and foreign key indexes
+
+Revision ID: 5c2d8e41f0a7
+Revises: 11f789e5decb
+Create Date: 2026-10-18 17:55:12.381907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2d8e41f0a7'
+down_revision: Union[str, None] = '11f789e5decb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Связи без одной из сторон бессмысленны, а дубли не дадут создать первичный ключ
+    op.execute("DELETE FROM company_activity WHERE company_id IS NULL OR activity_id IS NULL")
+    op.execute(
+        "DELETE FROM company_activity a USING company_activity b "
+        "WHERE a.company_id = b.company_id AND a.activity_id = b.activity_id AND a.ctid > b.ctid"
+    )
+    op.alter_column('company_activity', 'company_id', existing_type=sa.Integer(), nullable=False)
+    op.alter_column('company_activity', 'activity_id', existing_type=sa.Integer(), nullable=False)
+    op.create_primary_key('company_activity_pkey', 'company_activity', ['company_id', 'activity_id'])
+    op.create_index('ix_company_activity_activity_id_company_id', 'company_activity', ['activity_id', 'company_id'], unique=False)
+    op.create_index(op.f('ix_companies_building_id'), 'companies', ['building_id'], unique=False)
+    op.create_index(op.f('ix_company_phones_company_id'), 'company_phones', ['company_id'], unique=False)
+    op.create_index(op.f('ix_activities_parent_id'), 'activities', ['parent_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_activities_parent_id'), table_name='activities')
+    op.drop_index(op.f('ix_company_phones_company_id'), table_name='company_phones')
+    op.drop_index(op.f('ix_companies_building_id'), table_name='companies')
+    op.drop_index('ix_company_activity_activity_id_company_id', table_name='company_activity')
+    op.drop_constraint('company_activity_pkey', 'company_activity', type_='primary')
+    op.alter_column('company_activity', 'activity_id', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('company_activity', 'company_id', existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,135 @@
+import json
+import time
+import logging
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.config.config import QUERY_BUDGET, QUERY_LOG_LEVEL
+from app.monitoring.metrics import db_queries, db_query_seconds
+
+
+logger = logging.getLogger("app.queries")
+
+MAX_LOGGED_STATEMENT = 500
+
+
+class QueryStats:
+    """SQL-запросы, выполненные в рамках одного HTTP-запроса"""
+
+    __slots__ = ("count", "total", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+
+
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    db_queries.inc()
+    db_query_seconds.inc(amount=elapsed)
+    stats = current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def _handle_error(context):
+    started = context.connection.info.get("query_started") if context.connection else None
+    if started:
+        started.pop()
+
+
+def configure_query_log(level: str = QUERY_LOG_LEVEL):
+    """Свой обработчик для app.queries: корневой логгер с уровнем WARNING отбрасывал бы записи INFO"""
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        ))
+        logger.addHandler(handler)
+        logger.propagate = False
+
+
+def install_query_hooks(engine: AsyncEngine):
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """Считает SQL-запросы на HTTP-запрос.
+
+    Итоги уходят в заголовок Server-Timing и в лог app.queries; при
+    превышении QUERY_BUDGET запись пишется с уровнем WARNING.
+    """
+
+    def __init__(self, app, budget: int = QUERY_BUDGET):
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", self._server_timing(stats, started).encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            self._log(scope, status, stats, started)
+
+    def _server_timing(self, stats: QueryStats, started: float) -> str:
+        return (
+            f'db;dur={stats.total * 1000:.2f};desc="{stats.count} queries", '
+            f"db-slowest;dur={stats.slowest * 1000:.2f}, "
+            f"app;dur={(time.perf_counter() - started) * 1000:.2f}"
+        )
+
+    def _log(self, scope, status: Optional[int], stats: QueryStats, started: float):
+        over_budget = self.budget > 0 and stats.count > self.budget
+        level = logging.WARNING if over_budget else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        logger.log(level, json.dumps({
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "queries": stats.count,
+            "db_ms": round(stats.total * 1000, 2),
+            "slowest_ms": round(stats.slowest * 1000, 2),
+            "slowest_statement": (stats.slowest_statement or "")[:MAX_LOGGED_STATEMENT] or None,
+            "over_budget": over_budget,
+        }, ensure_ascii=False))
@@ -1,8 +1,44 @@
-from typing import List
+import logging
+from sqlalchemy.exc import IntegrityError
 from app.database.database import get_db
+from pydantic import ValidationError, create_model
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
 from app.services.auth import verify_api_key
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import APIRouter, Depends, HTTPException
+from app.services.pagination import decode_cursor, set_next_cursor
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from app.database.schemas.bulk import BulkItemError, BulkResult, BulkDeleteResult
+
+
+MAX_BULK_ITEMS = 50_000
+
+logger = logging.getLogger(__name__)
+
+
+def validate_items(schema: Type, raw_items: List[Dict[str, Any]], keys: Sequence[str] = ()):
+    """Валидация элементов пакета; при заданных keys повтор ключа в пакете - ошибка, первый элемент остаётся"""
+    valid, errors = [], []
+    seen: Dict[Tuple, int] = {}
+    for index, raw in enumerate(raw_items):
+        try:
+            item = schema.model_validate(raw)
+        except ValidationError as e:
+            errors.append(BulkItemError(
+                index=index,
+                detail=e.errors(include_url=False, include_context=False, include_input=False)
+            ))
+            continue
+        key = tuple(getattr(item, name, None) for name in keys)
+        if keys and None not in key:
+            if key in seen:
+                errors.append(BulkItemError(
+                    index=index,
+                    detail=f"Duplicate {', '.join(keys)} of item {seen[key]}"
+                ))
+                continue
+            seen[key] = index
+        valid.append(item)
+    return valid, errors
 
 
 class AutoRouterGenerator:
@@ -33,6 +69,9 @@ class AutoRouterGenerator:
                 'create': {'path': self.router.prefix + '/', 'methods': ['POST']},
                 'update': {'path': self.router.prefix + '/{item_id}', 'methods': ['PUT']},
                 'delete': {'path': self.router.prefix + '/{item_id}', 'methods': ['DELETE']},
+                'bulk_create': {'path': self.router.prefix + '/bulk', 'methods': ['POST']},
+                'bulk_upsert': {'path': self.router.prefix + '/bulk', 'methods': ['PUT']},
+                'bulk_delete': {'path': self.router.prefix + '/bulk', 'methods': ['DELETE']},
             }
             
             self.router.routes = [
@@ -67,17 +106,24 @@ class AutoRouterGenerator:
         update_schema = getattr(self, 'update_schema', None)
         model_name = getattr(self, 'model_name', 'item')
         
+        self._add_bulk_routes()
+        
         if not self._is_route_disabled('get_all'):
             @self.router.get("/", response_model=List[schema])
-            async def read_items(skip: int = 0, limit: int = 100,
+            async def read_items(response: Response, skip: int = 0, limit: int = 100,
+                after: Optional[str] = Query(None, description="Cursor from X-Next-Cursor header"),
                 db: AsyncSession = Depends(get_db)
             ):
-                return await crud_instance.get_multi(db, skip=skip, limit=limit)
+                items = await crud_instance.get_multi_projection(
+                    db, schema, skip=skip, limit=limit, after=decode_cursor(after)
+                )
+                set_next_cursor(response, items, limit)
+                return items
         
         if not self._is_route_disabled('get_by_id'):
             @self.router.get("/{item_id}", response_model=schema)
             async def read_item(item_id: int, db: AsyncSession = Depends(get_db)):
-                item = await crud_instance.get(db, item_id)
+                item = await crud_instance.get_projection(db, item_id, schema)
                 if not item:
                     raise HTTPException(status_code=404, detail=f"{model_name} not found")
                 return item
@@ -103,6 +149,73 @@ class AutoRouterGenerator:
                     raise HTTPException(status_code=404, detail=f"{model_name} not found")
                 return {"message": f"{model_name} deleted successfully"}
 
+    def _add_bulk_routes(self):
+        """Пакетные операции: одна транзакция, ошибки валидации - по индексу элемента"""
+        crud_instance = self.service
+        model_name = getattr(self, 'model_name', 'item')
+        schema = self.schema
+        create_schema = getattr(self, 'create_schema', None)
+        result_schema = BulkResult[schema]
+        items_body = Body(..., max_length=MAX_BULK_ITEMS)
+        
+        async def write(method, db: AsyncSession, objs_in, errors):
+            try:
+                items = await method(db, objs_in) if objs_in else []
+            except IntegrityError as e:
+                await db.rollback()
+                logger.warning("Bulk write to %s rejected: %s", model_name, e.orig)
+                raise HTTPException(status_code=409, detail=crud_instance.integrity_error_detail(e))
+            return result_schema(
+                items=[schema.model_validate(item, from_attributes=True) for item in items],
+                errors=errors
+            )
+        
+        if create_schema and not self._is_route_disabled('bulk_create'):
+            @self.router.post("/bulk", response_model=result_schema)
+            async def bulk_create_items(
+                items: List[Dict[str, Any]] = items_body,
+                db: AsyncSession = Depends(get_db)
+            ):
+                objs_in, errors = validate_items(create_schema, items)
+                return await write(crud_instance.bulk_create, db, objs_in, errors)
+        
+        if create_schema and not self._is_route_disabled('bulk_upsert'):
+            upsert_schema = create_schema
+            if 'id' in crud_instance.conflict_keys:
+                upsert_schema = create_model(
+                    f"{create_schema.__name__}Upsert",
+                    __base__=create_schema,
+                    id=(Optional[int], None)
+                )
+            
+            @self.router.put("/bulk", response_model=result_schema)
+            async def bulk_upsert_items(
+                items: List[Dict[str, Any]] = items_body,
+                db: AsyncSession = Depends(get_db)
+            ):
+                objs_in, errors = validate_items(upsert_schema, items, crud_instance.conflict_keys)
+                return await write(crud_instance.bulk_upsert, db, objs_in, errors)
+        
+        if not self._is_route_disabled('bulk_delete'):
+            @self.router.delete("/bulk", response_model=BulkDeleteResult)
+            async def bulk_delete_items(
+                ids: List[int] = items_body,
+                db: AsyncSession = Depends(get_db)
+            ):
+                try:
+                    deleted = await crud_instance.bulk_delete(db, ids)
+                except IntegrityError as e:
+                    await db.rollback()
+                    logger.warning("Bulk delete from %s rejected: %s", model_name, e.orig)
+                    raise HTTPException(status_code=409, detail=crud_instance.integrity_error_detail(e))
+                deleted_ids = set(deleted)
+                errors = [
+                    BulkItemError(index=index, detail="Not found")
+                    for index, item_id in enumerate(ids)
+                    if item_id not in deleted_ids
+                ]
+                return BulkDeleteResult(deleted=deleted, errors=errors)
+
     def _is_route_disabled(self, route_name: str) -> bool:
         disabled_routes = getattr(self, 'disabled_routes', {})
         return route_name in disabled_routes
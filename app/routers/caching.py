@@ -0,0 +1,146 @@
+import time
+from typing import Dict, List, Optional, Tuple
+from email.utils import formatdate, parsedate_to_datetime
+from starlette.routing import Match
+from app.config.config import SECRET_API_KEY
+from app.monitoring.metrics import cache_requests
+from app.routers.streaming import NDJSON_MEDIA_TYPE
+from app.services.cache import ResponseCache, response_cache
+
+
+MAX_CACHED_BODY = 1_000_000
+
+# Таблицы, от которых зависят ответы под префиксом: компании отдаются
+# вместе со зданием и видами деятельности
+CACHE_TAGS: Dict[str, Tuple[str, ...]] = {
+    "/activities": ("activities",),
+    "/buildings": ("buildings",),
+    "/companies": ("companies", "buildings", "activities"),
+}
+
+SKIPPED_HEADERS = {b"server-timing", b"x-cache", b"etag", b"last-modified"}
+
+
+def is_not_modified(headers: Dict[bytes, bytes], etag: str, modified: float, stored: bool = False) -> bool:
+    """Проверка If-None-Match, а при его отсутствии - If-Modified-Since (RFC 7232)"""
+    if_none_match = headers.get(b"if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.decode("latin-1").split(",")}
+        # "*" совпадает только с существующим ресурсом, а о нём известно
+        # лишь по сохранённому ответу 200
+        if "*" in tags:
+            return stored
+        # Для GET сравнение слабое: W/"x" и "x" считаются совпадающими
+        return etag in tags or etag[2:] in tags
+    if_modified_since = headers.get(b"if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since.decode("latin-1")).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(modified) <= since
+
+
+def validator_headers(etag: str, modified: float) -> List[Tuple[bytes, bytes]]:
+    headers = [(b"etag", etag.encode())]
+    # Изменение в текущей секунде нельзя отличить от следующего в ту же
+    # секунду, поэтому Last-Modified отдаётся, только когда секунда прошла
+    if int(modified) < int(time.time()):
+        headers.append((b"last-modified", formatdate(modified, usegmt=True).encode()))
+    return headers
+
+
+def cache_tags(path: str) -> Optional[Tuple[str, ...]]:
+    for prefix, tags in CACHE_TAGS.items():
+        if path == prefix or path.startswith(prefix + "/"):
+            return tags
+    return None
+
+
+def resolve_route(scope):
+    """Дополняет scope маршрутом и параметрами пути так же, как это сделал бы роутер"""
+    for route in scope["app"].routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            scope.update(child_scope)
+            return
+
+
+class ResponseCacheMiddleware:
+    """Отдаёт закэшированные ответы GET, не доходя до роутеров и базы.
+
+    Кэшируются только успешные JSON-ответы запросов с верным ключом API;
+    NDJSON-потоки и Cache-Control: no-cache обходят кэш. ETag и Last-Modified
+    строятся по версиям тех же таблиц, так что условный запрос получает 304
+    без обращения к базе, даже если самого ответа в кэше уже нет. Исключение -
+    If-None-Match: *, на него 304 отдаётся только при сохранённом ответе.
+    Перед ответом из кэша в scope записывается маршрут, чтобы метрики
+    относили такие ответы к нему, а не к unmatched.
+    """
+
+    def __init__(self, app, cache: ResponseCache = response_cache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not self.cache.enabled:
+            return await self.app(scope, receive, send)
+        tags = cache_tags(scope["path"])
+        headers = dict(scope["headers"])
+        if (
+            tags is None
+            or headers.get(b"x-api-key", b"").decode("latin-1") != SECRET_API_KEY
+            or NDJSON_MEDIA_TYPE.encode() in headers.get(b"accept", b"")
+        ):
+            return await self.app(scope, receive, send)
+
+        key, modified = await self.cache.key(scope["path"], scope["query_string"], tags)
+        etag = self.cache.etag(key)
+        validators = validator_headers(etag, modified)
+        cached = None
+        if b"*" in headers.get(b"if-none-match", b""):
+            cached = await self.cache.get(key)
+        if is_not_modified(headers, etag, modified, cached is not None):
+            cache_requests.inc("response", "not_modified")
+            resolve_route(scope)
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if b"no-cache" not in headers.get(b"cache-control", b""):
+            cached = cached or await self.cache.get(key)
+            if cached is not None:
+                cache_requests.inc("response", "hit")
+                resolve_route(scope)
+                status, cached_headers, body = cached
+                await send({
+                    "type": "http.response.start",
+                    "status": status,
+                    "headers": cached_headers + validators + [(b"x-cache", b"HIT")]
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+        cache_requests.inc("response", "miss")
+
+        start = None
+        chunks = []
+        size = 0
+
+        async def send_and_store(message):
+            nonlocal start, size
+            if message["type"] == "http.response.start":
+                start = message
+                extra = validators if message["status"] == 200 else []
+                message["headers"] = list(message.get("headers", [])) + extra + [(b"x-cache", b"MISS")]
+            elif message["type"] == "http.response.body" and start["status"] == 200 and size <= MAX_CACHED_BODY:
+                chunks.append(message.get("body", b""))
+                size += len(chunks[-1])
+                if not message.get("more_body") and size <= MAX_CACHED_BODY:
+                    await self.cache.set(key, 200, [
+                        (name, value) for name, value in start["headers"]
+                        if name.lower() not in SKIPPED_HEADERS
+                    ], b"".join(chunks))
+            await send(message)
+
+        await self.app(scope, receive, send_and_store)
@@ -1,15 +1,80 @@
-from typing import List
+import io
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
 from app.database.database import get_db
 from app.services.auth import verify_api_key
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.company import CompanyService
 from app.services.company import get_company_service
+from app.services.company import CompanyFacet, FACET_SIZE, FACET_CELL_SIZE
+from app.services.distance import DistanceMode
+from app.services.geo import MAX_RADIUS_KM
+from app.services.company_import import ImportFormat
 from app.database.schemas.company import Company, \
-     CompanyCreate, CompanyUpdate, CompanyWithRelations
-from fastapi import APIRouter, Depends, HTTPException, Query
+     CompanyCreate, CompanyUpdate, CompanyWithRelations, CompanyWithDistance, \
+     CompanySearch, CompanyFacets, GeoCluster, ImportReport
+from app.routers.streaming import ndjson_response, wants_ndjson
+from app.services.pagination import PageParams, decode_cursor, decode_rank_cursor, \
+     set_next_cursor, set_total_count, TOTAL_COUNT_HEADER
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
 from app.services.exceptions import BuildingNotFound, ActivityNotFound
 
 
+async def refined(items: AsyncIterator, refine: Callable[[List], List]):
+    async for item in items:
+        for kept in refine([item]):
+            yield kept
+
+
+async def paginate(
+    response: Response,
+    service: CompanyService,
+    db: AsyncSession,
+    query,
+    page: PageParams,
+    stream: bool = False,
+    refine: Optional[Callable[[List], List]] = None,
+    count: Optional[Callable[[], Awaitable[int]]] = None
+):
+    """Страница или NDJSON-поток организаций из query.
+
+    refine отсеивает лишнее из уже выбранной страницы (курсор строится до
+    него), count заменяет подсчёт по query, когда после refine он неточен.
+    """
+    count = count or (lambda: service.count(db, query))
+    if stream:
+        headers = {}
+        if page.with_total:
+            headers[TOTAL_COUNT_HEADER] = str(await count())
+        companies = service.stream_page(query, page.requested_limit, page.after)
+        return ndjson_response(
+            companies if refine is None else refined(companies, refine),
+            CompanyWithRelations,
+            headers
+        )
+    companies = await service.fetch_page(db, query, page.limit, page.after)
+    set_next_cursor(response, companies, page.limit)
+    if refine is not None:
+        companies = refine(companies)
+    if page.with_total:
+        set_total_count(response, await count())
+    return companies
+
+
+def search_filters(
+    lat: Optional[float] = Query(None, description="Center latitude", ge=-90, le=90),
+    lng: Optional[float] = Query(None, description="Center longitude", ge=-180, le=180),
+    radius: Optional[float] = Query(None, description="Radius in kilometers", gt=0),
+    activity_id: Optional[int] = Query(None, description="Activity id, including its subtree"),
+    activity_name: Optional[str] = Query(None, description="Activity name, including subtrees", min_length=1),
+    building_id: Optional[int] = Query(None, description="Building id"),
+    name: Optional[str] = Query(None, description="Part of the company name", min_length=1)
+) -> CompanySearch:
+    return CompanySearch(
+        lat=lat, lng=lng, radius=radius, activity_id=activity_id,
+        activity_name=activity_name, building_id=building_id, name=name
+    )
+
+
 class CompanyRouter:
     model_name = "companies"
     schema = Company
@@ -26,81 +91,177 @@ class CompanyRouter:
     @router.get("/building/{building_id}", response_model=List[CompanyWithRelations])
     async def get_companies_in_building(
         building_id: int,
+        response: Response,
+        page: PageParams = Depends(),
+        stream: bool = Depends(wants_ndjson),
         db: AsyncSession = Depends(get_db),
         service: CompanyService = Depends(get_company_service)
     ):
         """Список всех организаций находящихся в конкретном здании"""
-        companies = await service.get_companies_by_building(db, building_id)
-        return companies
+        query = await service.companies_by_building_query(db, building_id)
+        return await paginate(response, service, db, query, page, stream)
     
     @router.get("/activity/{activity_id}", response_model=List[CompanyWithRelations])
     async def get_companies_by_activity(
         activity_id: int,
+        response: Response,
+        page: PageParams = Depends(),
+        stream: bool = Depends(wants_ndjson),
         db: AsyncSession = Depends(get_db),
         service: CompanyService = Depends(get_company_service)
     ):
         """Список всех организаций, которые относятся к указанному виду деятельности"""
-        companies = await service.get_companies_by_activity(db, activity_id)
-        return companies
+        query = await service.companies_by_activity_query(db, activity_id)
+        return await paginate(response, service, db, query, page, stream)
     
     @router.get("/search/location/radius", response_model=List[CompanyWithRelations])
     async def get_companies_in_radius(
-        lat: float = Query(..., description="Center latitude"),
-        lng: float = Query(..., description="Center longitude"),
-        radius: float = Query(..., description="Radius in kilometers"),
+        response: Response,
+        lat: float = Query(..., description="Center latitude", ge=-90, le=90),
+        lng: float = Query(..., description="Center longitude", ge=-180, le=180),
+        radius: float = Query(..., description="Radius in kilometers", gt=0, le=MAX_RADIUS_KM),
+        accuracy: DistanceMode = Query(
+            DistanceMode.FAST,
+            description="fast - haversine, exact - geodesic on WGS-84"
+        ),
+        page: PageParams = Depends(),
+        stream: bool = Depends(wants_ndjson),
         db: AsyncSession = Depends(get_db),
         service: CompanyService = Depends(get_company_service)
     ):
         """Список организаций, которые находятся в заданном радиусе"""
-        companies = await service.get_companies_in_radius(db, lat, lng, radius)
-        return companies
+        query = await service.companies_in_radius_query(db, lat, lng, radius, accuracy)
+        return await paginate(
+            response, service, db, query, page, stream,
+            refine=lambda companies: service.refine_in_radius(companies, lat, lng, radius, accuracy),
+            count=lambda: service.count_in_radius(db, lat, lng, radius, accuracy)
+        )
+    
+    @router.get("/search/location/nearest", response_model=List[CompanyWithDistance])
+    async def get_nearest_companies(
+        lat: float = Query(..., description="Center latitude", ge=-90, le=90),
+        lng: float = Query(..., description="Center longitude", ge=-180, le=180),
+        limit: int = Query(20, description="Number of companies", ge=1, le=100),
+        accuracy: DistanceMode = Query(
+            DistanceMode.FAST,
+            description="fast - haversine, exact - geodesic on WGS-84"
+        ),
+        db: AsyncSession = Depends(get_db),
+        service: CompanyService = Depends(get_company_service)
+    ):
+        """Ближайшие к точке организации, упорядоченные по расстоянию (км)"""
+        nearest = await service.get_nearest_companies(db, lat, lng, limit, accuracy)
+        return [
+            CompanyWithDistance(
+                **CompanyWithRelations.model_validate(company, from_attributes=True).model_dump(),
+                distance=distance
+            )
+            for company, distance in nearest
+        ]
     
     @router.get("/search/location/rectangle", response_model=List[CompanyWithRelations])
     async def get_companies_in_rectangle(
+        response: Response,
         lat_min: float = Query(..., description="Minimum latitude"),
         lat_max: float = Query(..., description="Maximum latitude"),
         lng_min: float = Query(..., description="Minimum longitude"),
         lng_max: float = Query(..., description="Maximum longitude"),
+        page: PageParams = Depends(),
+        stream: bool = Depends(wants_ndjson),
         db: AsyncSession = Depends(get_db),
         service: CompanyService = Depends(get_company_service)
     ):
         """Список организаций, которые находятся в заданноЙ прямоугольной области"""
-        companies = await service.get_companies_in_rectangle(
+        query = await service.companies_in_rectangle_query(
             db, lat_min, lat_max, lng_min, lng_max
         )
-        return companies
+        return await paginate(response, service, db, query, page, stream)
+    
+    @router.get("/search/location/clusters", response_model=List[GeoCluster])
+    async def get_company_clusters(
+        lat_min: float = Query(..., description="Minimum latitude", ge=-90, le=90),
+        lat_max: float = Query(..., description="Maximum latitude", ge=-90, le=90),
+        lng_min: float = Query(..., description="Minimum longitude", ge=-180, le=180),
+        lng_max: float = Query(..., description="Maximum longitude (less than lng_min across the 180th meridian)", ge=-180, le=180),
+        zoom: int = Query(..., description="Web map zoom level", ge=0, le=22),
+        search: CompanySearch = Depends(search_filters),
+        db: AsyncSession = Depends(get_db),
+        service: CompanyService = Depends(get_company_service)
+    ):
+        """Кластеры организаций в области карты: число и центр масс по ячейкам сетки масштаба zoom"""
+        return await service.get_clusters(db, (lat_min, lat_max, lng_min, lng_max), zoom, search)
     
     @router.get("/search/activity", response_model=List[CompanyWithRelations])
     async def search_companies_by_activity(
+        response: Response,
         activity_name: str = Query(..., description="Activity name to search"),
+        page: PageParams = Depends(),
+        stream: bool = Depends(wants_ndjson),
         db: AsyncSession = Depends(get_db),
         service: CompanyService = Depends(get_company_service)
     ):
         """Искать организации по виду деятельности"""
-        companies = await service.search_companies_by_activity_tree(
+        query = await service.companies_by_activity_tree_query(
             db, activity_name
         )
-        return companies
+        return await paginate(response, service, db, query, page, stream)
     
     @router.get("/search/name", response_model=List[CompanyWithRelations])
     async def search_companies_by_name(
+        response: Response,
         name: str = Query(..., description="Company name to search"),
+        skip: int = Query(0, description="Skip records"),
+        page: PageParams = Depends(),
         db: AsyncSession = Depends(get_db),
         service: CompanyService = Depends(get_company_service)
     ):
-        """Поиск организации по названию"""
-        companies = await service.search_companies_by_name(db, name)
-        return companies
+        """Поиск организации по названию, наиболее похожие - первыми"""
+        ranked = await service.search_companies_by_name(
+            db, name, skip=skip, limit=page.limit, after=decode_rank_cursor(page.cursor)
+        )
+        set_next_cursor(response, ranked, page.limit, key=lambda row: [row[1], row[0].id])
+        if page.with_total:
+            query = await service.companies_by_name_query(db, name)
+            set_total_count(response, await service.count(db, query))
+        return [company for company, _ in ranked]
+    
+    @router.get("/search", response_model=List[CompanyWithRelations])
+    async def search_companies(
+        response: Response,
+        search: CompanySearch = Depends(search_filters),
+        page: PageParams = Depends(),
+        stream: bool = Depends(wants_ndjson),
+        db: AsyncSession = Depends(get_db),
+        service: CompanyService = Depends(get_company_service)
+    ):
+        """Поиск организаций по любому сочетанию фильтров одним запросом"""
+        query = await service.companies_search_query(db, search)
+        return await paginate(response, service, db, query, page, stream)
+    
+    @router.get("/search/facets", response_model=CompanyFacets, response_model_exclude_none=True)
+    async def search_company_facets(
+        search: CompanySearch = Depends(search_filters),
+        facets: List[CompanyFacet] = Query(list(CompanyFacet), description="Facets to count"),
+        size: int = Query(FACET_SIZE, description="Largest groups per facet", ge=1, le=1000),
+        cell_size: float = Query(FACET_CELL_SIZE, description="Grid cell size in degrees", gt=0, le=90),
+        db: AsyncSession = Depends(get_db),
+        service: CompanyService = Depends(get_company_service)
+    ):
+        """Число организаций по видам деятельности, зданиям и ячейкам сетки для тех же фильтров, что и /search"""
+        return await service.search_facets(db, search, facets, size, cell_size)
     
     @router.get("/", response_model=List[CompanyWithRelations])
     async def get_all_companies(
+        response: Response,
         skip: int = Query(0, description="Skip records"),
         limit: int = Query(100, description="Limit records", le=1000),
+        after: Optional[str] = Query(None, description="Cursor from X-Next-Cursor header"),
         db: AsyncSession = Depends(get_db),
         service: CompanyService = Depends(get_company_service),
     ):
         """Получение всех компаний"""
-        companies = await service.get_multi(db, skip=skip, limit=limit)
+        companies = await service.get_multi(db, skip=skip, limit=limit, after=decode_cursor(after))
+        set_next_cursor(response, companies, limit)
         return companies
     
     @router.get("/{item_id}", response_model=schema)
@@ -110,7 +271,7 @@ class CompanyRouter:
         service: CompanyService = Depends(get_company_service)
     ):
         """Получение компании по её id"""
-        company = await service.get(db, item_id)
+        company = await service.get(db, item_id, schema=Company)
         if not company:
             raise HTTPException(status_code=404, detail=f"Company not found")
         return company
@@ -145,6 +306,22 @@ class CompanyRouter:
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error creating company: {str(e)}")
         
+    @router.post("/import", response_model=ImportReport)
+    async def import_companies(
+        file: UploadFile = File(..., description="CSV or NDJSON file with companies"),
+        format: Optional[ImportFormat] = Query(
+            None,
+            description="csv or ndjson, by default - by file extension"
+        ),
+        db: AsyncSession = Depends(get_db),
+        service: CompanyService = Depends(get_company_service)
+    ):
+        """Массовый импорт компаний из CSV или NDJSON"""
+        fmt = format or ImportFormat.from_filename(file.filename)
+        # Файл читается в пуле потоков внутри импорта, здесь только обёртка
+        lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        return await service.import_companies(db, lines, fmt)
+        
     @router.put("/{company_id}", response_model=CompanyWithRelations)
     async def update_company(
         company_id: int,
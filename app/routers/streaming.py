@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from fastapi import Header
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, Optional, Type
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(accept: Optional[str] = Header(None, include_in_schema=False)) -> bool:
+    return accept is not None and NDJSON_MEDIA_TYPE in accept
+
+
+async def _ndjson_lines(items: AsyncIterator, schema: Type[BaseModel]):
+    async for item in items:
+        yield schema.model_validate(item, from_attributes=True).model_dump_json() + "\n"
+
+
+def ndjson_response(
+    items: AsyncIterator,
+    schema: Type[BaseModel],
+    headers: Optional[Dict[str, str]] = None
+) -> StreamingResponse:
+    """Построчная отдача результатов: по одному JSON-объекту на строку"""
+    return StreamingResponse(
+        _ndjson_lines(items, schema),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=headers
+    )
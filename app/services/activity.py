@@ -1,9 +1,17 @@
-from typing import Optional
-from sqlalchemy import select
+from pydantic import BaseModel
+from typing import Optional, Any, List
 from app.services.base import CRUDBase
-from app.database.models.activity import Activity
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database.schemas.activity import ActivityWithChildren
+from sqlalchemy import select, insert, delete, func, literal, true, or_
+from app.services.taxonomy import taxonomy_cache, fetch_taxonomy
+from app.database.models.company import company_activity
+from app.database.models.activity import Activity, activity_closure
+from app.services.exceptions import ActivityNotFound, \
+     ActivityDepthExceeded, ActivityCycleDetected
+
+
+MAX_ACTIVITY_LEVEL = 3
+CLOSURE_DEPTH_GUARD = 64
 
 
 class ActivityService(CRUDBase):
@@ -15,45 +23,223 @@ class ActivityService(CRUDBase):
         return result.scalar_one_or_none()
 
     @classmethod
-    async def get_activities_tree(cls, db: AsyncSession, max_depth: int = 3):
-        async def get_children(parent_id: Optional[int], current_depth: int = 0):
-            if current_depth >= max_depth:
-                return []
-            result = await db.execute(
-                select(Activity).where(Activity.parent_id == parent_id)
-            )
-            activities = result.scalars().all()
-            result_activities = []
-            for activity in activities:
-                children = await get_children(activity.id, current_depth + 1)
-                activity_dict = ActivityWithChildren(
-                    id=activity.id,
-                    name=activity.name,
-                    parent_id=activity.parent_id,
-                    children=children
-                )
-                result_activities.append(activity_dict)
-            return result_activities
-        return await get_children(None)
+    async def get_activities_tree(cls, db: AsyncSession, max_depth: int = 3, use_cache: bool = True):
+        taxonomy = await taxonomy_cache.get(db) if use_cache else await fetch_taxonomy(db)
+        return taxonomy.tree(max_depth)
+
+    @classmethod
+    def invalidate_cache(cls):
+        taxonomy_cache.invalidate()
     
     @classmethod
     async def get_activity_descendants(cls, db: AsyncSession, activity_id: int, max_depth: int = 3):
-        async def get_descendants_ids(parent_id: int, current_depth: int = 0, collected_ids: set = None):
-            if collected_ids is None:
-                collected_ids = set()
-            if current_depth >= max_depth:
-                return collected_ids
-            result = await db.execute(
-                select(Activity).where(Activity.parent_id == parent_id)
-            )
-            children = result.scalars().all()
-            for child in children:
-                collected_ids.add(child.id)
-                await get_descendants_ids(child.id, current_depth + 1, collected_ids)
-            return collected_ids
-        activity = await cls.get(db, activity_id)
-        if not activity:
-            return set()
-        descendant_ids = await get_descendants_ids(activity_id)
-        descendant_ids.add(activity_id)
-        return descendant_ids
\ No newline at end of file
+        taxonomy = await taxonomy_cache.get(db)
+        return taxonomy.descendants(activity_id, max_depth)
+
+    @classmethod
+    async def get_activity_level(cls, db: AsyncSession, activity_id: int) -> Optional[int]:
+        result = await db.execute(
+            select(func.max(activity_closure.c.depth))
+            .where(activity_closure.c.descendant_id == activity_id)
+        )
+        depth = result.scalar_one_or_none()
+        return None if depth is None else depth + 1
+
+    @classmethod
+    async def get_subtree_height(cls, db: AsyncSession, activity_id: int) -> int:
+        result = await db.execute(
+            select(func.coalesce(func.max(activity_closure.c.depth), 0))
+            .where(activity_closure.c.ancestor_id == activity_id)
+        )
+        return result.scalar_one()
+
+    @classmethod
+    async def _is_in_subtree(cls, db: AsyncSession, activity_id: int, node_id: int) -> bool:
+        result = await db.execute(
+            select(activity_closure.c.depth)
+            .where(
+                activity_closure.c.ancestor_id == activity_id,
+                activity_closure.c.descendant_id == node_id
+            )
+        )
+        return result.scalar_one_or_none() is not None
+
+    @classmethod
+    async def _check_parent(cls, db: AsyncSession, parent_id: Optional[int], subtree_height: int = 0):
+        if parent_id is None:
+            return
+        parent_level = await cls.get_activity_level(db, parent_id)
+        if parent_level is None:
+            raise ActivityNotFound(f"Activity with id {parent_id} not found")
+        if parent_level + 1 + subtree_height > MAX_ACTIVITY_LEVEL:
+            raise ActivityDepthExceeded(
+                f"Activity nesting is limited to {MAX_ACTIVITY_LEVEL} levels"
+            )
+
+    @classmethod
+    async def _attach_to_parent(cls, db: AsyncSession, activity_id: int, parent_id: Optional[int]):
+        if parent_id is None:
+            return
+        ancestors = activity_closure.alias("ancestors")
+        subtree = activity_closure.alias("subtree")
+        await db.execute(
+            insert(activity_closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    ancestors.c.ancestor_id,
+                    subtree.c.descendant_id,
+                    ancestors.c.depth + subtree.c.depth + 1
+                )
+                .select_from(ancestors.join(subtree, true()))
+                .where(
+                    ancestors.c.descendant_id == parent_id,
+                    subtree.c.ancestor_id == activity_id
+                )
+            )
+        )
+
+    @classmethod
+    async def _detach_from_parent(cls, db: AsyncSession, activity_id: int):
+        subtree_ids = (
+            select(activity_closure.c.descendant_id)
+            .where(activity_closure.c.ancestor_id == activity_id)
+        )
+        await db.execute(
+            delete(activity_closure)
+            .where(
+                activity_closure.c.descendant_id.in_(subtree_ids),
+                activity_closure.c.ancestor_id.not_in(subtree_ids)
+            )
+        )
+
+    @classmethod
+    async def create(cls, db: AsyncSession, obj_in: BaseModel) -> Activity:
+        await cls._check_parent(db, obj_in.parent_id)
+        db_obj = cls.model(**obj_in.model_dump())
+        db.add(db_obj)
+        await db.flush()
+        await db.execute(
+            insert(activity_closure)
+            .values(ancestor_id=db_obj.id, descendant_id=db_obj.id, depth=0)
+        )
+        await cls._attach_to_parent(db, db_obj.id, db_obj.parent_id)
+        await db.commit()
+        await db.refresh(db_obj)
+        await cls._after_commit()
+        return db_obj
+
+    @classmethod
+    async def update(cls, db: AsyncSession, db_obj: Activity, obj_in: BaseModel) -> Activity:
+        update_data = obj_in.model_dump(exclude_unset=True)
+        parent_id = update_data.get("parent_id", db_obj.parent_id)
+        if parent_id != db_obj.parent_id:
+            if parent_id is not None and await cls._is_in_subtree(db, db_obj.id, parent_id):
+                raise ActivityCycleDetected(
+                    f"Activity {db_obj.id} cannot be moved under its own descendant {parent_id}"
+                )
+            await cls._check_parent(db, parent_id, await cls.get_subtree_height(db, db_obj.id))
+            await cls._detach_from_parent(db, db_obj.id)
+            await cls._attach_to_parent(db, db_obj.id, parent_id)
+        return await super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    @classmethod
+    async def delete(cls, db: AsyncSession, id: Any) -> bool:
+        # При удалении у дочерних видов деятельности обнуляется parent_id, поэтому
+        # вместе со строками самого узла удаляются пути от его предков к поддереву
+        await db.execute(
+            delete(activity_closure)
+            .where(
+                activity_closure.c.ancestor_id.in_(
+                    select(activity_closure.c.ancestor_id)
+                    .where(activity_closure.c.descendant_id == id)
+                ),
+                activity_closure.c.descendant_id.in_(
+                    select(activity_closure.c.descendant_id)
+                    .where(activity_closure.c.ancestor_id == id)
+                )
+            )
+        )
+        return await super().delete(db, id=id)
+
+    @classmethod
+    def _closure_from_tree(cls, max_depth: int = CLOSURE_DEPTH_GUARD):
+        # Ограничение глубины страхует рекурсию от циклов в parent_id
+        tree = (
+            select(
+                Activity.id.label("ancestor_id"),
+                Activity.id.label("descendant_id"),
+                literal(0).label("depth")
+            )
+            .cte("tree", recursive=True)
+        )
+        tree = tree.union_all(
+            select(tree.c.ancestor_id, Activity.id, tree.c.depth + 1)
+            .join(Activity, Activity.parent_id == tree.c.descendant_id)
+            .where(tree.c.depth < max_depth)
+        )
+        return select(tree.c.ancestor_id, tree.c.descendant_id, tree.c.depth)
+
+    @classmethod
+    async def _fill_closure(cls, db: AsyncSession, max_depth: int = CLOSURE_DEPTH_GUARD):
+        await db.execute(delete(activity_closure))
+        await db.execute(
+            insert(activity_closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                cls._closure_from_tree(max_depth)
+            )
+        )
+
+    @classmethod
+    async def closure_is_consistent(cls, db: AsyncSession) -> bool:
+        """Совпадает ли activity_closure с деревом, построенным по parent_id"""
+        stored = select(
+            activity_closure.c.ancestor_id, activity_closure.c.descendant_id, activity_closure.c.depth
+        )
+        expected = cls._closure_from_tree()
+        result = await db.execute(
+            select(
+                select(stored.except_(expected).subquery()).exists(),
+                select(expected.except_(stored).subquery()).exists()
+            )
+        )
+        return not any(result.one())
+
+    @classmethod
+    async def rebuild_closure(cls, db: AsyncSession):
+        await cls._fill_closure(db)
+        await db.commit()
+        await cls._after_commit()
+
+    @classmethod
+    async def _before_bulk_delete(cls, db: AsyncSession, ids: List[int]):
+        await db.execute(
+            delete(company_activity).where(company_activity.c.activity_id.in_(ids))
+        )
+        await db.execute(
+            delete(activity_closure)
+            .where(
+                or_(
+                    activity_closure.c.ancestor_id.in_(ids),
+                    activity_closure.c.descendant_id.in_(ids)
+                )
+            )
+        )
+
+    @classmethod
+    async def _before_bulk_commit(cls, db: AsyncSession):
+        await cls._fill_closure(db, max_depth=MAX_ACTIVITY_LEVEL)
+        result = await db.execute(select(func.max(activity_closure.c.depth)))
+        if (result.scalar_one_or_none() or 0) >= MAX_ACTIVITY_LEVEL:
+            raise ActivityDepthExceeded(
+                f"Activity nesting is limited to {MAX_ACTIVITY_LEVEL} levels"
+            )
+
+    @classmethod
+    async def _after_commit(cls):
+        cls.invalidate_cache()
+        await super()._after_commit()
+
+    @classmethod
+    async def ensure_closure(cls, db: AsyncSession):
+        if not await cls.closure_is_consistent(db):
+            await cls.rebuild_closure(db)
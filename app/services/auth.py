@@ -16,4 +16,14 @@ async def verify_api_key(x_api_key: Optional[str] = Header(None, include_in_sche
             status_code=401,
             detail="Invalid API Key"
         )
-    return x_api_key
\ No newline at end of file
+    return x_api_key
+
+
+async def verify_metrics_key(
+    x_api_key: Optional[str] = Header(None, include_in_schema=False),
+    authorization: Optional[str] = Header(None, include_in_schema=False)
+):
+    """Тот же ключ, но допускается и как Bearer-токен: так его передаёт Prometheus"""
+    if not x_api_key and authorization and authorization.lower().startswith("bearer "):
+        x_api_key = authorization[len("bearer "):].strip()
+    return await verify_api_key(x_api_key)
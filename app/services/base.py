@@ -1,22 +1,89 @@
+import re
 from pydantic import BaseModel
 from sqlalchemy.future import select
+from sqlalchemy import delete, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Type, List, Optional, Any, ClassVar
+from sqlalchemy.dialects.postgresql import insert
+from typing import Type, List, Optional, Any, ClassVar, Dict, Tuple, Union
+from app.services.cache import response_cache
+from app.services.loading import loader_options, projection_columns
 from sqlalchemy.ext.declarative import DeclarativeMeta
 
 
+BULK_DELETE_CHUNK_SIZE = 10_000
+# "Key (address)=(...)" в DETAIL ошибки PostgreSQL: имена колонок без значений
+KEY_COLUMNS = re.compile(r"Key \((?P<columns>[^)]*)\)=")
+
+
 class CRUDBase:
     model: ClassVar[Type[DeclarativeMeta]]
+    conflict_keys: ClassVar[Tuple[str, ...]] = ("id",)
     
     @classmethod
-    async def get(cls, db: AsyncSession, id: Any) -> Optional[DeclarativeMeta]:
-        result = await db.execute(select(cls.model).where(cls.model.id == id))
+    async def get(
+        cls,
+        db: AsyncSession,
+        id: Any,
+        schema: Optional[Type[BaseModel]] = None
+    ) -> Optional[DeclarativeMeta]:
+        query = select(cls.model).where(cls.model.id == id)
+        if schema is not None:
+            query = query.options(*loader_options(cls.model, schema))
+        result = await db.execute(query)
         return result.scalar_one_or_none()
     
     @classmethod
-    async def get_multi(cls, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[DeclarativeMeta]:
-        result = await db.execute(select(cls.model).offset(skip).limit(limit))
+    async def get_multi(
+        cls,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        schema: Optional[Type[BaseModel]] = None
+    ) -> List[DeclarativeMeta]:
+        query = select(cls.model)
+        if schema is not None:
+            query = query.options(*loader_options(cls.model, schema))
+        result = await db.execute(cls._page(query, skip, limit, after))
         return result.scalars().all()
+
+    @classmethod
+    def _page(cls, query, skip: int = 0, limit: int = 100, after: Optional[int] = None):
+        query = query.order_by(cls.model.id).limit(limit)
+        if after is not None:
+            return query.where(cls.model.id > after)
+        return query.offset(skip)
+
+    @classmethod
+    async def get_projection(
+        cls,
+        db: AsyncSession,
+        id: Any,
+        schema: Type[BaseModel]
+    ) -> Union[Dict[str, Any], DeclarativeMeta, None]:
+        columns = projection_columns(cls.model, schema)
+        if columns is None:
+            return await cls.get(db, id, schema=schema)
+        result = await db.execute(select(*columns).where(cls.model.id == id))
+        row = result.mappings().one_or_none()
+        return dict(row) if row is not None else None
+
+    @classmethod
+    async def get_multi_projection(
+        cls,
+        db: AsyncSession,
+        schema: Type[BaseModel],
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None
+    ) -> List[Union[Dict[str, Any], DeclarativeMeta]]:
+        """Как get_multi, но для плоских схем читает только их колонки, без ORM-объектов"""
+        columns = projection_columns(cls.model, schema)
+        if columns is None:
+            return await cls.get_multi(db, skip=skip, limit=limit, after=after, schema=schema)
+        result = await db.execute(cls._page(select(*columns), skip, limit, after))
+        return [dict(row) for row in result.mappings()]
     
     @classmethod
     async def create(cls, db: AsyncSession, obj_in: BaseModel) -> DeclarativeMeta:
@@ -25,6 +92,7 @@ class CRUDBase:
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        await cls._after_commit()
         return db_obj
     
     @classmethod
@@ -35,6 +103,7 @@ class CRUDBase:
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        await cls._after_commit()
         return db_obj
     
     @classmethod
@@ -46,7 +115,157 @@ class CRUDBase:
             await db.delete(obj)
             await db.flush()
             await db.commit()
+            await cls._after_commit()
             return True
         except Exception:
             await db.rollback()
-            raise
\ No newline at end of file
+            raise
+
+    @classmethod
+    async def bulk_create(cls, db: AsyncSession, objs_in: List[BaseModel]) -> List[DeclarativeMeta]:
+        rows = [obj_in.model_dump() for obj_in in objs_in]
+        db_objs = await cls._bulk_insert(db, insert(cls.model), rows)
+        await cls._before_bulk_commit(db)
+        await db.commit()
+        await cls._after_commit()
+        return db_objs
+
+    @classmethod
+    async def bulk_upsert(cls, db: AsyncSession, objs_in: List[BaseModel]) -> List[DeclarativeMeta]:
+        keyed: Dict[Tuple, Dict[str, Any]] = {}
+        key_of: List[Optional[Tuple]] = []
+        new_rows, new_indexes = [], []
+        for index, obj_in in enumerate(objs_in):
+            row = obj_in.model_dump()
+            if row.get("id") is None or "id" not in cls.conflict_keys:
+                row.pop("id", None)
+            key = tuple(row.get(name) for name in cls.conflict_keys)
+            if None in key:
+                new_rows.append(row)
+                new_indexes.append(index)
+                key_of.append(None)
+            else:
+                # В одном INSERT ... ON CONFLICT строку нельзя обновить дважды,
+                # поэтому из повторов по ключу остаётся последний; HTTP-слой
+                # отклоняет повторы заранее
+                keyed[key] = row
+                key_of.append(key)
+
+        db_objs: List[Optional[DeclarativeMeta]] = [None] * len(objs_in)
+        if keyed:
+            statement = insert(cls.model)
+            update_columns = {
+                column.name: statement.excluded[column.name]
+                for column in cls.model.__table__.columns
+                if column.name not in cls.conflict_keys and not column.primary_key
+            }
+            statement = statement.on_conflict_do_update(
+                index_elements=list(cls.conflict_keys),
+                set_=update_columns
+            )
+            by_key = {}
+            for rows in cls._group_by_keys(list(keyed.values())).values():
+                result = await db.scalars(
+                    statement
+                    .returning(cls.model)
+                    .execution_options(populate_existing=True),
+                    rows
+                )
+                for db_obj in result.all():
+                    by_key[tuple(getattr(db_obj, name) for name in cls.conflict_keys)] = db_obj
+            for index, key in enumerate(key_of):
+                if key is not None:
+                    db_objs[index] = by_key[key]
+            if "id" in cls.conflict_keys:
+                await cls._sync_id_sequence(db)
+        if new_rows:
+            for index, db_obj in zip(new_indexes, await cls._bulk_insert(db, insert(cls.model), new_rows)):
+                db_objs[index] = db_obj
+        await cls._before_bulk_commit(db)
+        await db.commit()
+        await cls._after_commit()
+        return db_objs
+
+    @classmethod
+    async def bulk_delete(cls, db: AsyncSession, ids: List[int]) -> List[int]:
+        deleted = []
+        for start in range(0, len(ids), BULK_DELETE_CHUNK_SIZE):
+            chunk = ids[start:start + BULK_DELETE_CHUNK_SIZE]
+            await cls._before_bulk_delete(db, chunk)
+            result = await db.execute(
+                delete(cls.model)
+                .where(cls.model.id.in_(chunk))
+                .returning(cls.model.id)
+            )
+            deleted.extend(result.scalars().all())
+        await cls._before_bulk_commit(db)
+        await db.commit()
+        await cls._after_commit()
+        return deleted
+
+    @classmethod
+    def integrity_error_detail(cls, error: IntegrityError) -> str:
+        """Описание нарушенного ограничения для клиента - без текста драйвера, имён ограничений и значений"""
+        cause = error.orig.__cause__
+        sqlstate = getattr(error.orig, "sqlstate", None)
+        match = KEY_COLUMNS.match(getattr(cause, "detail", None) or "")
+        columns = match.group("columns") if match else None
+        if sqlstate == "23505":
+            return f"Conflict on unique field {columns}" if columns else "Conflict with an existing row"
+        if sqlstate == "23503":
+            if getattr(cause, "table_name", None) != cls.model.__tablename__:
+                return "Referenced by other rows"
+            return f"Referenced row does not exist: {columns}" if columns else "Referenced row does not exist"
+        if sqlstate == "23502" and getattr(cause, "column_name", None):
+            return f"Field {cause.column_name} is required"
+        return "Integrity constraint violated"
+
+    @classmethod
+    async def _bulk_insert(cls, db: AsyncSession, statement, rows: List[Dict[str, Any]]) -> List[DeclarativeMeta]:
+        groups = cls._group_by_keys(list(range(len(rows))), rows)
+        db_objs: List[Optional[DeclarativeMeta]] = [None] * len(rows)
+        for indexes in groups.values():
+            result = await db.scalars(
+                statement
+                .returning(cls.model, sort_by_parameter_order=True)
+                .execution_options(populate_existing=True),
+                [rows[index] for index in indexes]
+            )
+            for index, db_obj in zip(indexes, result.all()):
+                db_objs[index] = db_obj
+        return db_objs
+
+    @staticmethod
+    def _group_by_keys(items: List, rows: Optional[List[Dict[str, Any]]] = None) -> Dict[Tuple[str, ...], List]:
+        # executemany группирует строки в многострочные INSERT ... VALUES;
+        # строки с разным набором ключей нужно отправлять отдельными пачками
+        rows = items if rows is None else rows
+        groups: Dict[Tuple[str, ...], List] = {}
+        for item, row in zip(items, rows):
+            groups.setdefault(tuple(sorted(row)), []).append(item)
+        return groups
+
+    @classmethod
+    async def _sync_id_sequence(cls, db: AsyncSession):
+        table = cls.model.__tablename__
+        await db.execute(
+            select(
+                func.setval(
+                    func.pg_get_serial_sequence(table, "id"),
+                    select(func.coalesce(func.max(cls.model.id), 0) + 1).scalar_subquery(),
+                    False
+                )
+            )
+        )
+
+    @classmethod
+    async def _before_bulk_delete(cls, db: AsyncSession, ids: List[int]):
+        pass
+
+    @classmethod
+    async def _before_bulk_commit(cls, db: AsyncSession):
+        pass
+
+    @classmethod
+    async def _after_commit(cls):
+        await response_cache.invalidate(cls.model.__tablename__)
@@ -6,6 +6,7 @@ from app.database.models.building import Building
 
 class BuildingService(CRUDBase):
     model = Building
+    conflict_keys = ("address",)
 
     @classmethod
     async def get_building_by_address(cls, db: AsyncSession, address: str):
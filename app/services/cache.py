@@ -0,0 +1,152 @@
+import json
+import time
+import hashlib
+from uuid import uuid4
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.config.config import CACHE_BACKEND, CACHE_TTL, CACHE_MAX_ENTRIES, REDIS_URL
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+
+class MemoryBackend:
+    """LRU с TTL в памяти процесса; версии тегов живут отдельно от записей.
+
+    Версии начинаются с нуля при каждом запуске, поэтому в ETag добавляется
+    случайная метка процесса.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.epoch = uuid4().hex[:8]
+        self.started = time.time()
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._versions: Dict[str, Tuple[int, float]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def versions(self, tags: Iterable[str]) -> List[Tuple[int, float]]:
+        return [self._versions.get(tag, (0, self.started)) for tag in tags]
+
+    async def bump(self, tags: Iterable[str]):
+        now = time.time()
+        for tag in tags:
+            self._versions[tag] = (self._versions.get(tag, (0, now))[0] + 1, now)
+
+    async def clear(self):
+        self._entries.clear()
+
+
+class RedisBackend:
+    """Общий для всех воркеров кэш; подходит любой клиент с API redis.asyncio"""
+
+    prefix = "response-cache:"
+    epoch = "shared"
+
+    def __init__(self, client):
+        self.client = client
+        self.started = time.time()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        await self.client.set(self.prefix + key, value, ex=ttl)
+
+    async def versions(self, tags: Iterable[str]) -> List[Tuple[int, float]]:
+        tags = list(tags)
+        values = await self.client.mget(
+            [f"{self.prefix}version:{tag}" for tag in tags]
+            + [f"{self.prefix}modified:{tag}" for tag in tags]
+        )
+        return [
+            (int(version or 0), float(modified or self.started))
+            for version, modified in zip(values[:len(tags)], values[len(tags):])
+        ]
+
+    async def bump(self, tags: Iterable[str]):
+        now = time.time()
+        for tag in tags:
+            await self.client.incr(f"{self.prefix}version:{tag}")
+            await self.client.set(f"{self.prefix}modified:{tag}", now)
+
+    async def clear(self):
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            if not key.startswith((f"{self.prefix}version:".encode(), f"{self.prefix}modified:".encode())):
+                await self.client.delete(key)
+
+
+def create_backend(name: str = CACHE_BACKEND):
+    if name == "none":
+        return None
+    if name == "redis":
+        if aioredis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        return RedisBackend(aioredis.from_url(REDIS_URL))
+    return MemoryBackend()
+
+
+class ResponseCache:
+    """Кэш готовых ответов GET.
+
+    Ключ включает текущие версии таблиц, от которых зависит ответ: запись в
+    таблицу увеличивает её версию, и старые записи больше не находятся, а
+    затем вытесняются по LRU или TTL.
+    """
+
+    def __init__(self, backend=None, ttl: int = CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def key(self, path: str, query_string: bytes, tags: Tuple[str, ...]) -> Tuple[str, float]:
+        """Ключ ответа и время последнего изменения таблиц, от которых он зависит"""
+        versions = await self.backend.versions(tags)
+        params = "&".join(sorted(query_string.decode("latin-1").split("&")))
+        raw = f"{path}?{params}|" + ",".join(
+            f"{tag}={version}" for tag, (version, _) in zip(tags, versions)
+        )
+        return hashlib.sha1(raw.encode()).hexdigest(), max(modified for _, modified in versions)
+
+    def etag(self, key: str) -> str:
+        return f'W/"{key[:20]}-{self.backend.epoch}"'
+
+    async def get(self, key: str) -> Optional[Tuple[int, List[Tuple[bytes, bytes]], bytes]]:
+        value = await self.backend.get(key)
+        if value is None:
+            return None
+        meta, _, body = value.partition(b"\n")
+        status, headers = json.loads(meta)
+        return status, [(name.encode("latin-1"), data.encode("latin-1")) for name, data in headers], body
+
+    async def set(self, key: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        meta = json.dumps([status, [(name.decode("latin-1"), data.decode("latin-1")) for name, data in headers]])
+        await self.backend.set(key, meta.encode() + b"\n" + body, self.ttl)
+
+    async def invalidate(self, *tags: str):
+        if self.enabled:
+            await self.backend.bump(tags)
+
+
+response_cache = ResponseCache(create_backend())
@@ -1,30 +1,73 @@
-from sqlalchemy import select, and_
-from geopy.distance import geodesic
+from enum import Enum
+from pydantic import BaseModel
+from typing import Callable, Iterable, List, Optional, Tuple, Type
+from sqlalchemy import select, delete, and_, or_, func, distinct
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.services.activity import ActivityService
+from app.database.database import AsyncSessionLocal
 from app.services.building import BuildingService
 from app.database.models.building import Building
-from app.database.models.activity import Activity
-from app.database.models.company import Company, CompanyPhone
-from app.database.schemas.company import CompanyCreate, CompanyUpdate
-from app.services.exceptions import BuildingNotFound, ActivityNotFound
+from app.database.models.activity import Activity, activity_closure
+from app.database.models.company import Company, CompanyPhone, company_activity
+from app.services.cache import response_cache
+from app.services.geo import bounding_box, within_bounding_box, haversine_distance, grid_cell, \
+     grid_cells_count, cluster_cell_size, MAX_DISTANCE_KM, BOX_MARGIN
+from app.services.distance import DistanceMode, distances_km
+from app.services.loading import loader_options
+from app.database.schemas.company import CompanyCreate, CompanyUpdate, CompanyWithRelations, \
+     CompanySearch, CompanyFacets, ActivityFacet, BuildingFacet, GeoCellFacet, GeoCluster
+from app.services.exceptions import BuildingNotFound, ActivityNotFound, InvalidSearchFilters
+from app.services.company_import import CompanyImporter, ImportFormat, IMPORT_BATCH_SIZE
+from app.database.schemas.company import ImportReport
 
 
+NEAREST_START_RADIUS_KM = 1.0
+NEAREST_RADIUS_GROWTH = 4
+STREAM_BATCH_SIZE = 500
+FACET_SIZE = 50
+FACET_CELL_SIZE = 0.1
+MAX_CLUSTER_CELLS = 10_000
+
+
+class CompanyFacet(str, Enum):
+    ACTIVITY = "activity"
+    BUILDING = "building"
+    CELL = "cell"
+
 
 class CompanyService:
-    async def get(self, db: AsyncSession, company_id: int):
+    async def get(
+        self,
+        db: AsyncSession,
+        company_id: int,
+        schema: Type[BaseModel] = CompanyWithRelations,
+        columns: bool = True
+    ):
         result = await db.execute(
             select(Company)
+            .options(*loader_options(Company, schema, columns))
             .where(Company.id == company_id)
         )
         return result.scalar_one_or_none()
     
-    async def get_multi(self, db: AsyncSession, skip: int = 0, limit: int = 100):
-        result = await db.execute(
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        schema: Type[BaseModel] = CompanyWithRelations
+    ):
+        query = (
             select(Company)
-            .offset(skip)
+            .options(*loader_options(Company, schema))
+            .order_by(Company.id)
             .limit(limit)
         )
+        if after is not None:
+            query = query.where(Company.id > after)
+        else:
+            query = query.offset(skip)
+        result = await db.execute(query)
         return result.scalars().all()
     
     async def create(self, db: AsyncSession, skip: int = 0, limit: int = 100):
@@ -35,13 +78,13 @@ class CompanyService:
         )
         return result.scalars().all()
     
-    async def delete(self, db: AsyncSession, skip: int = 0, limit: int = 100):
-        result = await db.execute(
-            select(Company)
-            .offset(skip)
-            .limit(limit)
-        )
-        return result.scalars().all()
+    async def delete(self, db: AsyncSession, id: int) -> bool:
+        await db.execute(delete(company_activity).where(company_activity.c.company_id == id))
+        await db.execute(delete(CompanyPhone).where(CompanyPhone.company_id == id))
+        result = await db.execute(delete(Company).where(Company.id == id))
+        await db.commit()
+        await response_cache.invalidate(Company.__tablename__)
+        return result.rowcount > 0
     
     async def get_companies(self, db: AsyncSession, skip: int = 0, limit: int = 100):
         result = await db.execute(
@@ -51,49 +94,270 @@ class CompanyService:
         )
         return result.scalars().all()
 
-    async def get_companies_by_building(self, db: AsyncSession, building_id: int):
-        result = await db.execute(
-            select(Company)
-            .where(Company.building_id == building_id)
-        )
+    def _page_query(
+        self,
+        query,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        schema: Type[BaseModel] = CompanyWithRelations
+    ):
+        query = query.options(*loader_options(Company, schema)).order_by(Company.id)
+        if after is not None:
+            query = query.where(Company.id > after)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    async def fetch_page(
+        self,
+        db: AsyncSession,
+        query,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        schema: Type[BaseModel] = CompanyWithRelations
+    ):
+        result = await db.execute(self._page_query(query, limit, after, schema))
         return result.scalars().all()
 
-    async def get_companies_by_activity(self, db: AsyncSession, activity_id: int):
-        activity_descendants = await ActivityService().get_activity_descendants(db, activity_id)
+    async def stream_page(
+        self,
+        query,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        schema: Type[BaseModel] = CompanyWithRelations
+    ):
+        # Отдельная сессия: генератор живёт дольше зависимости get_db запроса
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(
+                self._page_query(query, limit, after, schema)
+                .execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+            async for company in result.scalars():
+                yield company
+
+    async def count(self, db: AsyncSession, query) -> int:
         result = await db.execute(
-            select(Company)
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+        return result.scalar_one()
+
+    async def companies_by_building_query(self, db: AsyncSession, building_id: int):
+        return select(Company).where(Company.building_id == building_id)
+
+    async def get_companies_by_building(
+        self, db: AsyncSession, building_id: int, limit: Optional[int] = None, after: Optional[int] = None
+    ):
+        query = await self.companies_by_building_query(db, building_id)
+        return await self.fetch_page(db, query, limit, after)
+
+    def in_activity_subtrees(self, ancestor_ids, max_depth: int = 3):
+        """Условие на организации с деятельностью из поддеревьев ancestor_ids.
+
+        Потомки берутся из activity_closure в том же запросе. IN даёт
+        полусоединение: организация с несколькими подходящими видами
+        деятельности попадает в выдачу один раз, а планировщик сам выбирает,
+        идти ли от связей (узкое поддерево) или от companies по id с LIMIT
+        (широкое).
+        """
+        matching = (
+            select(company_activity.c.company_id)
+            .join(activity_closure, activity_closure.c.descendant_id == company_activity.c.activity_id)
             .where(
-                Company.activities.any(Activity.id.in_(activity_descendants))
+                activity_closure.c.ancestor_id.in_(ancestor_ids),
+                activity_closure.c.depth <= max_depth
             )
         )
-        return result.scalars().all()
+        return Company.id.in_(matching)
+
+    def companies_in_activity_subtrees_query(self, ancestor_ids, max_depth: int = 3):
+        return select(Company).where(self.in_activity_subtrees(ancestor_ids, max_depth))
+
+    async def companies_by_activity_query(self, db: AsyncSession, activity_id: int):
+        return self.companies_in_activity_subtrees_query([activity_id])
+
+    async def get_companies_by_activity(
+        self, db: AsyncSession, activity_id: int, limit: Optional[int] = None, after: Optional[int] = None
+    ):
+        query = await self.companies_by_activity_query(db, activity_id)
+        return await self.fetch_page(db, query, limit, after)
+
+    async def companies_by_name_query(self, db: AsyncSession, name: str):
+        return select(Company).where(Company.name.ilike(f"%{name}%"))
+
+    async def search_companies_by_name(
+        self,
+        db: AsyncSession,
+        name: str,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[float, int]] = None
+    ):
+        """Возвращает пары (компания, похожесть) по убыванию похожести"""
+        rank = func.similarity(Company.name, name)
+        query = (
+            (await self.companies_by_name_query(db, name))
+            .add_columns(rank.label("rank"))
+            .options(*loader_options(Company, CompanyWithRelations))
+            .order_by(rank.desc(), Company.id)
+            .limit(limit)
+        )
+        if after is not None:
+            last_rank, last_id = after
+            query = query.where(
+                or_(rank < last_rank, and_(rank == last_rank, Company.id > last_id))
+            )
+        else:
+            query = query.offset(skip)
+        result = await db.execute(query)
+        return result.tuples().all()
+
+    async def companies_in_radius_query(
+        self,
+        db: AsyncSession,
+        center_lat: float,
+        center_lng: float,
+        radius_km: float,
+        mode: DistanceMode = DistanceMode.FAST
+    ):
+        # Для точного режима SQL отбирает кандидатов с запасом на разницу сферы
+        # и эллипсоида, а расстояние по geodesic проверяет refine_in_radius
+        limit_km = radius_km * BOX_MARGIN if mode == DistanceMode.EXACT else radius_km
+        return select(Company).where(self.in_radius(center_lat, center_lng, radius_km, limit_km))
 
-    async def search_companies_by_name(self, db: AsyncSession, name: str):
+    def in_radius(self, center_lat: float, center_lng: float, radius_km: float, limit_km: Optional[float] = None):
+        """Условие на организации в зданиях не дальше limit_km (по умолчанию radius_km) по haversine"""
+        return Company.building_id.in_(
+            select(Building.id).where(
+                within_bounding_box(Building, bounding_box(center_lat, center_lng, radius_km)),
+                haversine_distance(Building, center_lat, center_lng) <= (limit_km or radius_km)
+            ).correlate(None)
+        )
+
+    def refine_in_radius(
+        self,
+        companies: Iterable,
+        center_lat: float,
+        center_lng: float,
+        radius_km: float,
+        mode: DistanceMode = DistanceMode.FAST
+    ) -> List:
+        """Точная проверка расстояния для уже выбранной страницы"""
+        companies = list(companies)
+        if mode != DistanceMode.EXACT or not companies:
+            return companies
+        distances = distances_km(
+            center_lat, center_lng,
+            [company.building.latitude for company in companies],
+            [company.building.longitude for company in companies],
+            mode
+        )
+        return [company for company, distance in zip(companies, distances) if distance <= radius_km]
+
+    async def count_in_radius(
+        self,
+        db: AsyncSession,
+        center_lat: float,
+        center_lng: float,
+        radius_km: float,
+        mode: DistanceMode = DistanceMode.FAST
+    ) -> int:
+        """Число организаций в радиусе; в точном режиме geodesic считается только у зданий на границе"""
+        if mode != DistanceMode.EXACT:
+            return await self.count(db, await self.companies_in_radius_query(db, center_lat, center_lng, radius_km))
+        inner_km = radius_km / BOX_MARGIN
+        certain = await self.count(db, select(Company).where(
+            self.in_radius(center_lat, center_lng, radius_km, inner_km)
+        ))
+        distance = haversine_distance(Building, center_lat, center_lng)
         result = await db.execute(
-            select(Company)
-            .where(Company.name.ilike(f"%{name}%"))
+            select(Building.latitude, Building.longitude, func.count(Company.id))
+            .join(Company, Company.building_id == Building.id)
+            .where(
+                within_bounding_box(Building, bounding_box(center_lat, center_lng, radius_km)),
+                distance > inner_km,
+                distance <= radius_km * BOX_MARGIN
+            )
+            .group_by(Building.id)
         )
-        return result.scalars().all()
+        border = result.all()
+        if not border:
+            return certain
+        lats, lngs, counts = zip(*border)
+        distances = distances_km(center_lat, center_lng, lats, lngs, mode)
+        return certain + sum(count for count, distance in zip(counts, distances) if distance <= radius_km)
+
+    async def get_companies_in_radius(
+        self,
+        db: AsyncSession,
+        center_lat: float,
+        center_lng: float,
+        radius_km: float,
+        mode: DistanceMode = DistanceMode.FAST,
+        limit: Optional[int] = None,
+        after: Optional[int] = None
+    ):
+        query = await self.companies_in_radius_query(db, center_lat, center_lng, radius_km, mode)
+        companies = await self.fetch_page(db, query, limit, after)
+        return self.refine_in_radius(companies, center_lat, center_lng, radius_km, mode)
+
+    async def get_nearest_companies(
+        self,
+        db: AsyncSession,
+        center_lat: float,
+        center_lng: float,
+        limit: int = 20,
+        mode: DistanceMode = DistanceMode.FAST
+    ):
+        radius_km = NEAREST_START_RADIUS_KM
+        while True:
+            box = bounding_box(center_lat, center_lng, radius_km)
+            result = await db.execute(
+                select(Building.id, Building.latitude, Building.longitude, func.count(Company.id))
+                .join(Company, Company.building_id == Building.id)
+                .where(within_bounding_box(Building, box))
+                .group_by(Building.id)
+            )
+            candidates = result.all()
+            nearest = []
+            if candidates:
+                ids, lats, lngs, counts = zip(*candidates)
+                distances = distances_km(center_lat, center_lng, lats, lngs, mode)
+                nearest = sorted(
+                    (float(distance), building_id, count)
+                    for building_id, distance, count in zip(ids, distances, counts)
+                    if distance <= radius_km
+                )
+            # Всё, что за пределами радиуса, дальше любой найденной внутри него
+            # организации, поэтому при достаточном числе совпадений поиск завершается
+            if sum(count for _, _, count in nearest) >= limit or radius_km >= MAX_DISTANCE_KM:
+                break
+            radius_km = min(radius_km * NEAREST_RADIUS_GROWTH, MAX_DISTANCE_KM)
+
+        building_distances = {}
+        found = 0
+        for distance, building_id, count in nearest:
+            building_distances[building_id] = distance
+            found += count
+            if found >= limit:
+                break
+        if not building_distances:
+            return []
 
-    async def get_companies_in_radius(self, db: AsyncSession, center_lat: float, center_lng: float, radius_km: float):
         result = await db.execute(
-            select(Building)
+            select(Company)
+            .options(*loader_options(Company, CompanyWithRelations))
+            .where(Company.building_id.in_(building_distances))
         )
-        buildings = result.scalars().all()
-        
-        companies_in_radius = []
-        for building in buildings:
-            distance = geodesic(
-                (center_lat, center_lng), 
-                (building.latitude, building.longitude)
-            ).kilometers
-            
-            if distance <= radius_km:
-                companies_in_radius.extend(building.companies)
-        
-        return companies_in_radius
+        companies = sorted(
+            result.scalars().all(),
+            key=lambda company: (building_distances[company.building_id], company.id)
+        )
+        return [
+            (company, building_distances[company.building_id])
+            for company in companies[:limit]
+        ]
 
-    async def get_companies_in_rectangle(
+    async def companies_in_rectangle_query(
         self,
         db: AsyncSession, 
         lat_min: float, 
@@ -101,8 +365,11 @@ class CompanyService:
         lng_min: float, 
         lng_max: float
     ):
-        result = await db.execute(
-            select(Building)
+        if lat_min > lat_max:
+            raise InvalidSearchFilters("lat_min must not exceed lat_max")
+        return (
+            select(Company)
+            .join(Building, Company.building_id == Building.id)
             .where(
                 and_(
                     Building.latitude >= lat_min,
@@ -112,33 +379,180 @@ class CompanyService:
                 )
             )
         )
-        buildings = result.scalars().all()
-        
-        companies_in_rect = []
-        for building in buildings:
-            companies_in_rect.extend(building.companies)
-        
-        return companies_in_rect
 
-    async def search_companies_by_activity_tree(self, db: AsyncSession, activity_name: str):
-        result = await db.execute(
-            select(Activity).where(Activity.name.ilike(f"%{activity_name}%"))
+    async def get_companies_in_rectangle(
+        self,
+        db: AsyncSession, 
+        lat_min: float, 
+        lat_max: float, 
+        lng_min: float, 
+        lng_max: float,
+        limit: Optional[int] = None,
+        after: Optional[int] = None
+    ):
+        query = await self.companies_in_rectangle_query(db, lat_min, lat_max, lng_min, lng_max)
+        return await self.fetch_page(db, query, limit, after)
+
+    async def companies_by_activity_tree_query(self, db: AsyncSession, activity_name: str):
+        return self.companies_in_activity_subtrees_query(
+            select(Activity.id).where(Activity.name.ilike(f"%{activity_name}%"))
         )
-        activities = result.scalars().all()
-        
-        if not activities:
-            return []
-        
-        all_activity_ids = set()
-        for activity in activities:
-            descendants = await ActivityService().get_activity_descendants(db, activity.id)
-            all_activity_ids.update(descendants)
-        
-        result = await db.execute(
-            select(Company)
-            .where(Company.activities.any(Activity.id.in_(all_activity_ids)))
+
+    async def search_companies_by_activity_tree(
+        self, db: AsyncSession, activity_name: str, limit: Optional[int] = None, after: Optional[int] = None
+    ):
+        query = await self.companies_by_activity_tree_query(db, activity_name)
+        return await self.fetch_page(db, query, limit, after)
+
+    async def companies_search_query(self, db: AsyncSession, search: CompanySearch):
+        """Один запрос по всем заданным фильтрам.
+
+        Условия перечисляются от самых избирательных и дешёвых к самым
+        дорогим: равные по стоимости условия Postgres проверяет в порядке
+        записи, так что ILIKE по названию выполняется только для строк,
+        прошедших остальные фильтры.
+        """
+        conditions = []
+        if search.building_id is not None:
+            conditions.append(Company.building_id == search.building_id)
+        if search.location is not None:
+            if None in search.location:
+                raise InvalidSearchFilters("lat, lng and radius must be given together")
+            conditions.append(self.in_radius(*search.location))
+        if search.activity_id is not None:
+            conditions.append(self.in_activity_subtrees([search.activity_id]))
+        if search.activity_name:
+            conditions.append(self.in_activity_subtrees(
+                select(Activity.id).where(Activity.name.ilike(f"%{search.activity_name}%"))
+            ))
+        if search.name:
+            conditions.append(Company.name.ilike(f"%{search.name}%"))
+        return select(Company).where(*conditions)
+
+    async def search_companies(
+        self, db: AsyncSession, search: CompanySearch, limit: Optional[int] = None, after: Optional[int] = None
+    ):
+        query = await self.companies_search_query(db, search)
+        return await self.fetch_page(db, query, limit, after)
+
+    async def search_facets(
+        self,
+        db: AsyncSession,
+        search: CompanySearch,
+        facets: Iterable[CompanyFacet] = tuple(CompanyFacet),
+        size: int = FACET_SIZE,
+        cell_size: float = FACET_CELL_SIZE
+    ) -> CompanyFacets:
+        """Счётчики по найденным организациям, по одному GROUP BY на разрез.
+
+        Организация учитывается в каждом виде деятельности-предке своих видов
+        деятельности, но не больше одного раза в каждом; в разрезах остаются
+        size самых крупных групп.
+        """
+        matching = (
+            (await self.companies_search_query(db, search))
+            .with_only_columns(Company.id, Company.building_id)
+            .subquery()
         )
-        return result.scalars().all()
+        result = CompanyFacets(total=(await db.execute(
+            select(func.count()).select_from(matching)
+        )).scalar_one())
+
+        if CompanyFacet.ACTIVITY in facets:
+            count = func.count(distinct(company_activity.c.company_id)).label("count")
+            rows = await db.execute(
+                select(Activity.id, Activity.name, count)
+                .select_from(matching)
+                .join(company_activity, company_activity.c.company_id == matching.c.id)
+                .join(activity_closure, activity_closure.c.descendant_id == company_activity.c.activity_id)
+                .join(Activity, Activity.id == activity_closure.c.ancestor_id)
+                .group_by(Activity.id)
+                .order_by(count.desc(), Activity.id)
+                .limit(size)
+            )
+            result.activities = [ActivityFacet(**row) for row in rows.mappings()]
+
+        if CompanyFacet.BUILDING in facets:
+            count = func.count().label("count")
+            rows = await db.execute(
+                select(Building.id, Building.address, count)
+                .select_from(matching)
+                .join(Building, Building.id == matching.c.building_id)
+                .group_by(Building.id)
+                .order_by(count.desc(), Building.id)
+                .limit(size)
+            )
+            result.buildings = [BuildingFacet(**row) for row in rows.mappings()]
+
+        if CompanyFacet.CELL in facets:
+            count = func.count().label("count")
+            lat_cell, lng_cell = grid_cell(Building, cell_size)
+            rows = await db.execute(
+                select(lat_cell, lng_cell, count)
+                .select_from(matching)
+                .join(Building, Building.id == matching.c.building_id)
+                .group_by(lat_cell, lng_cell)
+                .order_by(count.desc(), lat_cell, lng_cell)
+                .limit(size)
+            )
+            result.cells = [
+                GeoCellFacet(
+                    lat=round(row.lat_cell * cell_size, 9),
+                    lng=round(row.lng_cell * cell_size, 9),
+                    size=cell_size,
+                    count=row.count
+                )
+                for row in rows
+            ]
+        return result
+
+    async def get_clusters(
+        self,
+        db: AsyncSession,
+        box: Tuple[float, float, float, float],
+        zoom: int,
+        search: Optional[CompanySearch] = None
+    ) -> List[GeoCluster]:
+        """Организации в области карты, сгруппированные в ячейки сетки под масштаб.
+
+        Группировка выполняется в базе, так что размер ответа зависит от
+        числа ячеек на экране, а не от числа организаций.
+        """
+        if box[0] > box[1]:
+            raise InvalidSearchFilters("lat_min must not exceed lat_max")
+        cell_size = cluster_cell_size(zoom)
+        if grid_cells_count(box, cell_size) > MAX_CLUSTER_CELLS:
+            raise InvalidSearchFilters(f"Area is too large for zoom {zoom}")
+        query = await self.companies_search_query(db, search or CompanySearch())
+        lat_cell, lng_cell = grid_cell(Building, cell_size)
+        rows = await db.execute(
+            query
+            .with_only_columns(
+                lat_cell,
+                lng_cell,
+                func.count().label("count"),
+                func.count(distinct(Building.id)).label("buildings"),
+                func.avg(Building.latitude).label("lat"),
+                func.avg(Building.longitude).label("lng")
+            )
+            .select_from(Company)
+            .join(Building, Company.building_id == Building.id)
+            .where(within_bounding_box(Building, box))
+            .group_by(lat_cell, lng_cell)
+            .order_by(lat_cell, lng_cell)
+        )
+        return [
+            GeoCluster(
+                lat=row.lat,
+                lng=row.lng,
+                count=row.count,
+                buildings=row.buildings,
+                cell_lat=round(row.lat_cell * cell_size, 9),
+                cell_lng=round(row.lng_cell * cell_size, 9),
+                size=cell_size
+            )
+            for row in rows
+        ]
 
     async def create_company(self, db: AsyncSession, company_data: CompanyCreate):
         building = await BuildingService().get(db, company_data.building_id)
@@ -164,16 +578,11 @@ class CompanyService:
         
         db.add(db_company)
         await db.commit()
-        await db.refresh(db_company)
-        
-        result = await db.execute(
-            select(Company)
-            .where(Company.id == db_company.id)
-        )
-        return result.scalar_one()
+        await response_cache.invalidate(Company.__tablename__)
+        return await self._reload(db, db_company.id)
 
     async def update_company(self, db: AsyncSession, company_id: int, company_data: CompanyUpdate):
-        db_company = await self.get(db, company_id)
+        db_company = await self.get(db, company_id, columns=False)
         if not db_company:
             return None
         
@@ -199,9 +608,28 @@ class CompanyService:
                 db_company.phones.append(db_phone)
         
         await db.commit()
-        await db.refresh(db_company)
-        
-        return db_company
+        await response_cache.invalidate(Company.__tablename__)
+        return await self._reload(db, company_id)
+
+    async def import_companies(
+        self,
+        db: AsyncSession,
+        lines: Iterable[str],
+        fmt: ImportFormat = ImportFormat.CSV,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        on_progress: Optional[Callable[[ImportReport], None]] = None
+    ) -> ImportReport:
+        importer = CompanyImporter(db, batch_size, on_progress)
+        return await importer.run(lines, fmt)
+
+    async def _reload(self, db: AsyncSession, company_id: int):
+        result = await db.execute(
+            select(Company)
+            .options(*loader_options(Company, CompanyWithRelations))
+            .where(Company.id == company_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one()
     
 def get_company_service():
     return CompanyService()
\ No newline at end of file
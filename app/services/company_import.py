@@ -0,0 +1,206 @@
+import csv
+import json
+import logging
+from enum import Enum
+from pydantic import ValidationError
+from collections import defaultdict
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.bulk import allocate_ids, load_via_staging
+from app.services.cache import response_cache
+from app.database.models.building import Building
+from app.database.models.activity import Activity
+from app.database.models.company import Company, CompanyPhone, company_activity
+from app.database.schemas.company import CompanyImportRow, ImportRejectedRow, ImportReport
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_REJECTS = 1000
+
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+    @classmethod
+    def from_filename(cls, filename: Optional[str]) -> "ImportFormat":
+        if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+            return cls.NDJSON
+        return cls.CSV
+
+
+def read_rows(lines: Iterable[str], fmt: ImportFormat) -> Iterator[Tuple[int, Any]]:
+    """Пары (номер строки, словарь полей или текст ошибки разбора)"""
+    if fmt == ImportFormat.CSV:
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, {
+                key: value for key, value in row.items()
+                if key and value not in (None, "")
+            }
+        return
+
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, f"Invalid JSON: {e}"
+
+
+class CompanyImporter:
+    """Пакетная загрузка компаний.
+
+    Ссылки на здания и виды деятельности разрешаются одним запросом на пачку,
+    id компаний выделяются заранее из последовательности, а строки companies,
+    company_phones и company_activity загружаются через COPY.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        on_progress: Optional[Callable[[ImportReport], None]] = None
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.report = ImportReport()
+
+    async def run(self, lines: Iterable[str], fmt: ImportFormat) -> ImportReport:
+        rows = read_rows(lines, fmt)
+        done = False
+        while not done:
+            # Чтение и разбор файла синхронные, в цикле событий они блокировали бы остальные запросы
+            batch, done = await run_in_threadpool(self._parse_batch, rows)
+            await self._flush(batch)
+        return self.report
+
+    def _parse_batch(self, rows: Iterator[Tuple[int, Any]]) -> Tuple[List[Tuple[int, CompanyImportRow]], bool]:
+        """Следующая пачка валидных строк и признак конца файла"""
+        batch: List[Tuple[int, CompanyImportRow]] = []
+        for line_number, raw in rows:
+            self.report.total += 1
+            if isinstance(raw, str):
+                self._reject(line_number, raw)
+                continue
+            try:
+                batch.append((line_number, CompanyImportRow.model_validate(raw)))
+            except ValidationError as e:
+                self._reject(
+                    line_number,
+                    e.errors(include_url=False, include_context=False, include_input=False)
+                )
+            if len(batch) >= self.batch_size:
+                return batch, False
+        return batch, True
+
+    def _reject(self, line_number: int, detail: Any):
+        self.report.rejected_count += 1
+        if len(self.report.rejected) < MAX_REPORTED_REJECTS:
+            self.report.rejected.append(ImportRejectedRow(line=line_number, detail=detail))
+
+    async def _flush(self, batch: List[Tuple[int, CompanyImportRow]]):
+        if batch:
+            resolved = None
+            try:
+                resolved = await self._resolve(batch)
+                await self._load(resolved)
+                await self.db.commit()
+                await response_cache.invalidate(Company.__tablename__)
+                self.report.imported += len(resolved)
+            except DBAPIError as e:
+                # Ошибки данных (SQLSTATE 22xxx) и ограничений относятся к строкам пачки,
+                # остальные - к базе, и импорт прерывается
+                data_error = (getattr(e.orig, "sqlstate", None) or "").startswith("22")
+                if not (data_error or isinstance(e, IntegrityError)):
+                    raise
+                await self.db.rollback()
+                logger.warning("Company import batch rejected: %s", e.orig)
+                detail = "Value is invalid for the database" if data_error else "Rejected by database constraints"
+                for line_number, *_ in batch if resolved is None else resolved:
+                    self._reject(line_number, detail)
+        logger.info(
+            "Company import: %s rows read, %s imported, %s rejected",
+            self.report.total, self.report.imported, self.report.rejected_count
+        )
+        if self.on_progress:
+            self.on_progress(self.report)
+
+    async def _resolve(self, batch: List[Tuple[int, CompanyImportRow]]):
+        building_ids = {row.building_id for _, row in batch if row.building_id is not None}
+        addresses = {row.building_address for _, row in batch if row.building_id is None}
+        buildings = await self.db.execute(
+            select(Building.id, Building.address)
+            .where(or_(Building.id.in_(building_ids), Building.address.in_(addresses)))
+        )
+        known_buildings: Set[int] = set()
+        building_by_address: Dict[str, int] = {}
+        for building_id, address in buildings:
+            known_buildings.add(building_id)
+            building_by_address[address] = building_id
+
+        activity_ids = {activity_id for _, row in batch for activity_id in row.activity_ids}
+        activity_names = {name for _, row in batch for name in row.activity_names}
+        activities = await self.db.execute(
+            select(Activity.id, Activity.name)
+            .where(or_(Activity.id.in_(activity_ids), Activity.name.in_(activity_names)))
+        )
+        known_activities: Set[int] = set()
+        activities_by_name: Dict[str, List[int]] = defaultdict(list)
+        for activity_id, name in activities:
+            known_activities.add(activity_id)
+            activities_by_name[name].append(activity_id)
+
+        resolved = []
+        for line_number, row in batch:
+            errors = []
+            if row.building_id is not None:
+                building_id = row.building_id if row.building_id in known_buildings else None
+                if building_id is None:
+                    errors.append(f"Building with id {row.building_id} not found")
+            else:
+                building_id = building_by_address.get(row.building_address)
+                if building_id is None:
+                    errors.append(f"Building with address {row.building_address!r} not found")
+
+            row_activities = dict.fromkeys(row.activity_ids)
+            missing = [activity_id for activity_id in row_activities if activity_id not in known_activities]
+            if missing:
+                errors.append(f"Activities with id {missing} not found")
+            for name in row.activity_names:
+                matches = activities_by_name.get(name, [])
+                if len(matches) != 1:
+                    errors.append(
+                        f"Activity {name!r} not found" if not matches
+                        else f"Activity name {name!r} is ambiguous"
+                    )
+                else:
+                    row_activities[matches[0]] = None
+
+            if errors:
+                self._reject(line_number, errors)
+                continue
+            resolved.append((line_number, row, building_id, list(row_activities)))
+        return resolved
+
+    async def _load(self, resolved):
+        if not resolved:
+            return
+        ids = await allocate_ids(self.db, Company.__table__, len(resolved))
+
+        companies, phones, links = [], [], []
+        for company_id, (_, row, building_id, activity_ids) in zip(ids, resolved):
+            companies.append((company_id, row.name, building_id))
+            phones.extend((company_id, phone) for phone in row.phone_numbers)
+            links.extend((company_id, activity_id) for activity_id in activity_ids)
+
+        await load_via_staging(self.db, Company.__table__, ("id", "name", "building_id"), companies)
+        await load_via_staging(self.db, CompanyPhone.__table__, ("company_id", "phone_number"), phones)
+        await load_via_staging(self.db, company_activity, ("company_id", "activity_id"), links)
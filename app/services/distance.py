@@ -0,0 +1,43 @@
+import numpy as np
+from enum import Enum
+from typing import Sequence
+from geopy.distance import geodesic
+from app.services.geo import EARTH_RADIUS_KM
+
+
+class DistanceMode(str, Enum):
+    FAST = "fast"
+    EXACT = "exact"
+
+
+def haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Расстояния по большому кругу от точки до массива точек, в километрах"""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlng = np.radians(lngs) - np.radians(lng)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def geodesic_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Точные расстояния на эллипсоиде WGS-84 (geopy), в километрах"""
+    return np.fromiter(
+        (geodesic((lat, lng), point).kilometers for point in zip(lats, lngs)),
+        dtype=float,
+        count=len(lats)
+    )
+
+
+def distances_km(
+    lat: float,
+    lng: float,
+    lats: Sequence[float],
+    lngs: Sequence[float],
+    mode: DistanceMode = DistanceMode.FAST
+) -> np.ndarray:
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    if mode == DistanceMode.EXACT:
+        return geodesic_km(lat, lng, lats, lngs)
+    return haversine_km(lat, lng, lats, lngs)
@@ -3,4 +3,19 @@ class BuildingNotFound(Exception):
 
 
 class ActivityNotFound(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class ActivityDepthExceeded(Exception):
+    pass
+
+
+class ActivityCycleDetected(Exception):
+    pass
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class InvalidSearchFilters(Exception):
+    pass
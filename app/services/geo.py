@@ -0,0 +1,77 @@
+import math
+from typing import Tuple
+from sqlalchemy import and_, or_, func
+
+
+EARTH_RADIUS_KM = 6371.0088
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+# Больший радиус делает рамку почти глобальной, и она перестаёт отсекать здания
+MAX_RADIUS_KM = 1000.0
+# Запас на разницу между сферой и эллипсоидом WGS-84, чтобы рамка
+# гарантированно покрывала круг, посчитанный через geodesic
+BOX_MARGIN = 1.01
+# Ячеек кластеризации на сторону тайла 256px: кластер около 32px на экране
+CLUSTER_CELLS_PER_TILE = 8
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Прямоугольник (lat_min, lat_max, lng_min, lng_max), описанный вокруг круга.
+
+    При пересечении 180-го меридиана lng_min оказывается больше lng_max.
+    """
+    angular = radius_km * BOX_MARGIN / EARTH_RADIUS_KM
+    delta_lat = math.degrees(angular)
+    lat_min = lat - delta_lat
+    lat_max = lat + delta_lat
+
+    if lat_min <= -90 or lat_max >= 90 or angular >= math.pi / 2:
+        return max(lat_min, -90.0), min(lat_max, 90.0), -180.0, 180.0
+
+    delta_lng = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(math.radians(lat)))))
+    lng_min = lng - delta_lng
+    lng_max = lng + delta_lng
+    if lng_min < -180:
+        lng_min += 360
+    if lng_max > 180:
+        lng_max -= 360
+    return lat_min, lat_max, lng_min, lng_max
+
+
+def within_bounding_box(model, box: Tuple[float, float, float, float]):
+    lat_min, lat_max, lng_min, lng_max = box
+    lat_filter = and_(model.latitude >= lat_min, model.latitude <= lat_max)
+    if lng_min <= lng_max:
+        return and_(lat_filter, model.longitude >= lng_min, model.longitude <= lng_max)
+    return and_(lat_filter, or_(model.longitude >= lng_min, model.longitude <= lng_max))
+
+
+def haversine_distance(model, lat: float, lng: float):
+    """SQL-выражение расстояния по большому кругу до точки, в километрах"""
+    dlat = func.radians(model.latitude - lat)
+    dlng = func.radians(model.longitude - lng)
+    a = (
+        func.power(func.sin(dlat / 2), 2)
+        + math.cos(math.radians(lat)) * func.cos(func.radians(model.latitude)) * func.power(func.sin(dlng / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(func.least(a, 1.0)))
+
+
+def grid_cell(model, cell_size: float):
+    """Номера ячеек сетки cell_size x cell_size градусов для координат модели"""
+    return (
+        func.floor(model.latitude / cell_size).label("lat_cell"),
+        func.floor(model.longitude / cell_size).label("lng_cell"),
+    )
+
+
+def cluster_cell_size(zoom: int) -> float:
+    """Сторона ячейки кластеризации в градусах для масштаба веб-карты"""
+    return 360.0 / 2 ** zoom / CLUSTER_CELLS_PER_TILE
+
+
+def grid_cells_count(box: Tuple[float, float, float, float], cell_size: float) -> int:
+    """Число ячеек сетки cell_size x cell_size градусов, которые задевает прямоугольник"""
+    lat_min, lat_max, lng_min, lng_max = box
+    lng_span = lng_max - lng_min if lng_min <= lng_max else lng_max - lng_min + 360
+    return (math.floor(lat_max / cell_size) - math.floor(lat_min / cell_size) + 1) * \
+        (math.ceil(lng_span / cell_size) + 1)
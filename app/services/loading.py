@@ -0,0 +1,58 @@
+from functools import lru_cache
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from typing import Optional, Tuple, Type, get_args
+from sqlalchemy.orm import selectinload, raiseload, load_only
+
+
+def _nested_schema(annotation) -> Optional[Type[BaseModel]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        nested = _nested_schema(arg)
+        if nested is not None:
+            return nested
+    return None
+
+
+def _schema_options(model, schema: Type[BaseModel], columns: bool) -> list:
+    mapper = inspect(model)
+    options = []
+    column_names = [
+        name for name in schema.model_fields
+        if name in mapper.column_attrs
+    ]
+    if columns and column_names:
+        options.append(load_only(*(getattr(model, name) for name in column_names)))
+
+    for name, field in schema.model_fields.items():
+        if name not in mapper.relationships:
+            continue
+        loader = selectinload(getattr(model, name))
+        nested = _nested_schema(field.annotation)
+        if nested is not None:
+            related = mapper.relationships[name].mapper.class_
+            loader = loader.options(*_schema_options(related, nested, columns))
+        options.append(loader)
+
+    options.append(raiseload("*"))
+    return options
+
+
+@lru_cache(maxsize=None)
+def loader_options(model, schema: Type[BaseModel], columns: bool = True) -> Tuple:
+    """Опции загрузки под схему ответа.
+
+    Подгружаются только колонки и связи, которые есть в схеме; обращение к
+    остальным связям бросает исключение вместо незаметного N+1 запроса.
+    """
+    return tuple(_schema_options(model, schema, columns))
+
+
+@lru_cache(maxsize=None)
+def projection_columns(model, schema: Type[BaseModel]) -> Optional[Tuple]:
+    """Колонки модели для плоской схемы или None, если схеме нужны связи"""
+    mapper = inspect(model)
+    if any(name not in mapper.column_attrs for name in schema.model_fields):
+        return None
+    return tuple(getattr(model, name) for name in schema.model_fields)
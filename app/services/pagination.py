@@ -0,0 +1,91 @@
+import json
+import math
+import base64
+import binascii
+from fastapi import Query, Response
+from typing import Any, Callable, Mapping, Optional, Sequence, Tuple
+from app.services.exceptions import InvalidCursor
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(value: Any) -> str:
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str], kind: type = int) -> Any:
+    if token is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        value = json.loads(raw)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+    if not isinstance(value, kind):
+        raise InvalidCursor(f"Invalid cursor: {token}")
+    return value
+
+
+def decode_rank_cursor(token: Optional[str]) -> Optional[Tuple[float, int]]:
+    """Курсор выдачи по убыванию похожести: пара [rank, id]"""
+    value = decode_cursor(token, list)
+    if value is None:
+        return None
+    if (
+        len(value) != 2
+        or isinstance(value[0], bool) or not isinstance(value[0], (int, float)) or not math.isfinite(value[0])
+        or isinstance(value[1], bool) or not isinstance(value[1], int)
+    ):
+        raise InvalidCursor(f"Invalid cursor: {token}")
+    return float(value[0]), value[1]
+
+
+def item_id(item: Any) -> Any:
+    return item["id"] if isinstance(item, Mapping) else item.id
+
+
+def set_next_cursor(
+    response: Response,
+    items: Sequence,
+    limit: int,
+    key: Callable[[Any], Any] = item_id
+):
+    """Выставляет курсор следующей страницы, если текущая заполнена целиком"""
+    if items and len(items) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(items[-1]))
+
+
+def set_total_count(response: Response, total: int):
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+
+
+class PageParams:
+    """Общие параметры постраничной выдачи для эндпоинтов поиска"""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(
+            None,
+            description=f"Limit records (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE}; "
+                        "NDJSON streams are unlimited unless set)",
+            ge=1
+        ),
+        after: Optional[str] = Query(None, description="Cursor from X-Next-Cursor header"),
+        with_total: bool = Query(False, description="Return total count in X-Total-Count header")
+    ):
+        self.requested_limit = limit
+        self.cursor = after
+        self.with_total = with_total
+
+    @property
+    def limit(self) -> int:
+        return min(self.requested_limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+    @property
+    def after(self) -> Any:
+        return decode_cursor(self.cursor)
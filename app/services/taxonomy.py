@@ -0,0 +1,94 @@
+import asyncio
+from sqlalchemy import select
+from collections import defaultdict
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Set, Iterable
+from app.database.models.activity import Activity
+from app.database.schemas.activity import ActivityWithChildren
+from app.monitoring.metrics import cache_requests
+
+
+class ActivityTaxonomy:
+    """Неизменяемый снимок таблицы activities с предрасчитанными потомками"""
+
+    def __init__(self, activities: Iterable, version: int = 0):
+        self.version = version
+        self.nodes = {activity.id: activity for activity in activities}
+        self.children: Dict[Optional[int], List[int]] = defaultdict(list)
+        for activity_id in sorted(self.nodes):
+            self.children[self.nodes[activity_id].parent_id].append(activity_id)
+
+        self._descendant_depths: Dict[int, Dict[int, int]] = {}
+        for activity_id in self.nodes:
+            depths = {activity_id: 0}
+            level = [activity_id]
+            depth = 0
+            while level:
+                depth += 1
+                level = [child for node in level for child in self.children.get(node, [])]
+                depths.update((child, depth) for child in level)
+            self._descendant_depths[activity_id] = depths
+        self._trees: Dict[int, List[ActivityWithChildren]] = {}
+
+    def descendants(self, activity_id: int, max_depth: int = 3) -> Set[int]:
+        depths = self._descendant_depths.get(activity_id, {})
+        return {node for node, depth in depths.items() if depth <= max_depth}
+
+    def tree(self, max_depth: int = 3) -> List[ActivityWithChildren]:
+        if max_depth not in self._trees:
+            self._trees[max_depth] = self._build(None, max_depth)
+        return self._trees[max_depth]
+
+    def _build(self, parent_id: Optional[int], max_depth: int, current_depth: int = 0):
+        if current_depth >= max_depth:
+            return []
+        return [
+            ActivityWithChildren(
+                id=activity_id,
+                name=self.nodes[activity_id].name,
+                parent_id=parent_id,
+                children=self._build(activity_id, max_depth, current_depth + 1)
+            )
+            for activity_id in self.children.get(parent_id, [])
+        ]
+
+
+async def fetch_taxonomy(db: AsyncSession, version: int = 0) -> ActivityTaxonomy:
+    result = await db.execute(select(Activity.id, Activity.name, Activity.parent_id))
+    return ActivityTaxonomy(result.all(), version)
+
+
+class TaxonomyCache:
+    def __init__(self):
+        self._snapshot: Optional[ActivityTaxonomy] = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    async def get(self, db: AsyncSession) -> ActivityTaxonomy:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            cache_requests.inc("taxonomy", "hit")
+            return snapshot
+        cache_requests.inc("taxonomy", "miss")
+        async with self._lock:
+            if self._snapshot is None or self._snapshot.version != self._version:
+                return await self.load(db)
+            return self._snapshot
+
+    async def load(self, db: AsyncSession) -> ActivityTaxonomy:
+        # Версия фиксируется до чтения: если запись случится во время загрузки,
+        # снимок окажется устаревшим и будет перечитан при следующем обращении
+        version = self._version
+        self._snapshot = await fetch_taxonomy(db, version)
+        return self._snapshot
+
+    def invalidate(self):
+        self._version += 1
+        self._snapshot = None
+
+
+taxonomy_cache = TaxonomyCache()
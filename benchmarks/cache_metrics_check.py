@@ -0,0 +1,65 @@
+"""Проверка меток маршрута в метриках для ответов из кэша.
+
+    python -m benchmarks.cache_metrics_check
+
+Запрашивает одну организацию трижды: промах кэша, попадание и условный
+запрос с ETag (304). Все три ответа должны попасть в http_requests_total
+с шаблоном маршрута /companies/{item_id}, а не с меткой unmatched. Код
+выхода 1, если хотя бы одна проверка не прошла.
+"""
+import sys
+import asyncio
+import logging
+from typing import List
+import httpx
+from sqlalchemy import select
+from app.config.config import SECRET_API_KEY
+from app.database.database import engine, AsyncSessionLocal
+from app.database.models.company import Company
+from app.fastapi_app import app
+from app.monitoring.metrics import http_requests
+
+ROUTE = "/companies/{item_id}"
+
+
+async def main() -> int:
+    logging.getLogger("app.queries").setLevel(logging.WARNING)
+    failures: List[str] = []
+
+    def check(name: str, condition: bool):
+        print(f"{'ok' if condition else 'FAIL':4} {name}")
+        if not condition:
+            failures.append(name)
+
+    async with AsyncSessionLocal() as db:
+        company_id = (await db.execute(select(Company.id).order_by(Company.id).limit(1))).scalar_one()
+
+    headers = {"X-API-Key": SECRET_API_KEY, "Cache-Control": "no-cache"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # no-cache обходит кэш и заново сохраняет ответ, так что следующий запрос - попадание
+        miss = await client.get(f"/companies/{company_id}", headers=headers)
+        headers.pop("Cache-Control")
+        hit_before = http_requests.value("GET", ROUTE, 200)
+        unmatched_before = sum(
+            http_requests.value("GET", "unmatched", status) for status in (200, 304, 404)
+        )
+        hit = await client.get(f"/companies/{company_id}", headers=headers)
+        check("cache hit", hit.headers.get("x-cache") == "HIT")
+        check("hit labelled with route", http_requests.value("GET", ROUTE, 200) == hit_before + 1)
+
+        not_modified_before = http_requests.value("GET", ROUTE, 304)
+        conditional = await client.get(
+            f"/companies/{company_id}", headers={**headers, "If-None-Match": miss.headers["etag"]}
+        )
+        check("not modified", conditional.status_code == 304)
+        check("304 labelled with route", http_requests.value("GET", ROUTE, 304) == not_modified_before + 1)
+        check("nothing unmatched", unmatched_before == sum(
+            http_requests.value("GET", "unmatched", status) for status in (200, 304, 404)
+        ))
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,66 @@
+"""Проверка согласованности activity_closure при изменении дерева видов деятельности.
+
+    python -m benchmarks.closure_check
+
+Создаёт во временных узлах цепочки A -> B -> C, выполняет над ними
+операции ActivityService и после каждой сверяет activity_closure с деревом,
+построенным по parent_id. Созданные узлы удаляются в конце. Код выхода 1,
+если хотя бы одна проверка не прошла.
+"""
+import sys
+import asyncio
+from uuid import uuid4
+from typing import List
+from app.database.database import engine, AsyncSessionLocal
+from app.database.schemas.activity import ActivityCreate, ActivityUpdate
+from app.services.activity import ActivityService
+from app.services.exceptions import ActivityDepthExceeded
+
+
+async def create(db, name: str, parent_id=None) -> int:
+    activity = await ActivityService.create(
+        db, ActivityCreate(name=f"closure check {name} {uuid4().hex[:8]}", parent_id=parent_id)
+    )
+    return activity.id
+
+
+async def main() -> int:
+    failures: List[str] = []
+    created: List[int] = []
+
+    async def check(name: str, db, condition: bool = True):
+        consistent = await ActivityService.closure_is_consistent(db)
+        ok = consistent and condition
+        print(f"{'ok' if ok else 'FAIL':4} {name}")
+        if not ok:
+            failures.append(name)
+
+    async with AsyncSessionLocal() as db:
+        try:
+            a = await create(db, "A")
+            b = await create(db, "B", a)
+            c = await create(db, "C", b)
+            created += [a, b, c]
+            await check("create chain", db)
+
+            await ActivityService.delete(db, b)
+            created.remove(b)
+            await check("delete middle node", db, await ActivityService.get_activity_level(db, c) == 1)
+
+            try:
+                created.append(await create(db, "D", c))
+                await check("create under orphaned child", db)
+            except ActivityDepthExceeded:
+                await check("create under orphaned child", db, False)
+
+            await ActivityService.update(db, await ActivityService.get(db, c), ActivityUpdate(parent_id=a))
+            await check("move subtree", db, await ActivityService.get_activity_level(db, c) == 2)
+        finally:
+            for activity_id in reversed(created):
+                await ActivityService.delete(db, activity_id)
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,259 @@
+"""Проверка планов горячих запросов CompanyService и ActivityService.
+
+    python -m benchmarks.query_plans [--reset] [--natural]
+
+Каждая проверка вызывает метод сервиса, перехватывает отправленные им
+SQL-запросы и прогоняет их через EXPLAIN. По умолчанию планировщику
+запрещено последовательное сканирование (enable_seqscan = off), и Seq Scan
+по перечисленным в проверке таблицам остаётся в плане, только если
+подходящего индекса нет. Полный обход индекса без Index Cond - та же
+замена Seq Scan и тоже считается ошибкой, а каждый индекс из списка
+проверки должен встретиться в плане с условием, иначе удаление индекса
+осталось бы незамеченным. С --natural планы проверяются как есть - это
+имеет смысл на базе реального размера. Код выхода 1, если хотя бы одна
+проверка не прошла.
+"""
+import sys
+import json
+import asyncio
+import argparse
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterator, List, Tuple
+from sqlalchemy import event, exists, select, text
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import engine, AsyncSessionLocal
+from app.database.models.activity import Activity
+from app.database.models.building import Building
+from app.database.models.company import Company
+from app.database.schemas.company import CompanySearch
+from app.database.run_mock import SeedParams
+from app.services.activity import ActivityService
+from app.services.company import CompanyService
+from app.services.taxonomy import taxonomy_cache
+from benchmarks.run import reset_database
+
+
+@dataclass
+class Sample:
+    """Существующие строки, по которым строятся проверяемые запросы"""
+    company_id: int
+    company_name: str
+    building_id: int
+    latitude: float
+    longitude: float
+    activity_id: int
+    activity_name: str
+    leaf_activity_id: int
+    leaf_activity_name: str
+
+    @classmethod
+    async def load(cls, db: AsyncSession) -> "Sample":
+        company = (await db.execute(
+            select(Company.id, Company.name, Building.id, Building.latitude, Building.longitude)
+            .join(Building, Company.building_id == Building.id)
+            .order_by(Company.id)
+            .limit(1)
+        )).one()
+        activity = (await db.execute(
+            select(Activity.id, Activity.name)
+            .where(Activity.parent_id.is_(None))
+            .order_by(Activity.id)
+            .limit(1)
+        )).one()
+        # Поддерево корня - большая часть организаций, индекс по activity_id
+        # проявляется только на узком поддереве листа
+        child = aliased(Activity)
+        leaf = (await db.execute(
+            select(Activity.id, Activity.name)
+            .where(~exists().where(child.parent_id == Activity.id))
+            .order_by(Activity.id.desc())
+            .limit(1)
+        )).one()
+        return cls(*company, *activity, *leaf)
+
+    @property
+    def name_fragment(self) -> str:
+        return max(self.company_name.split(), key=len)
+
+
+@dataclass
+class Check:
+    name: str
+    run: Callable[[AsyncSession, Sample], Awaitable]
+    tables: Tuple[str, ...]
+    indexes: Tuple[str, ...] = ()
+
+
+COMPANY_TABLES = ("companies", "company_phones", "company_activity")
+# Догрузка телефонов, здания и видов деятельности для страницы организаций
+COMPANY_LOAD_INDEXES = ("ix_company_phones_company_id", "ix_buildings_id", "company_activity_pkey")
+
+CHECKS: List[Check] = [
+    Check(
+        "companies.get",
+        lambda db, s: CompanyService().get(db, s.company_id),
+        COMPANY_TABLES + ("buildings", "activities"),
+        ("ix_companies_id", "ix_activities_id") + COMPANY_LOAD_INDEXES
+    ),
+    Check(
+        "companies.by_building",
+        lambda db, s: CompanyService().get_companies_by_building(db, s.building_id, limit=20),
+        COMPANY_TABLES,
+        ("ix_companies_building_id",) + COMPANY_LOAD_INDEXES
+    ),
+    # Выборки по виду деятельности проверяются без limit: первую страницу
+    # планировщик законно собирает обходом companies по id, пока не наберёт
+    # совпадения, и на ней индекс по activity_id не проявляется
+    Check(
+        "companies.by_activity",
+        lambda db, s: CompanyService().get_companies_by_activity(db, s.leaf_activity_id),
+        COMPANY_TABLES,
+        ("activity_closure_pkey", "ix_company_activity_activity_id_company_id") + COMPANY_LOAD_INDEXES
+    ),
+    Check(
+        # Справочник видов деятельности - десятки строк, и фильтр по имени
+        # планировщик вправе проверить полным обходом, поэтому activities не в списке
+        "companies.by_activity_tree",
+        lambda db, s: CompanyService().search_companies_by_activity_tree(db, s.leaf_activity_name),
+        COMPANY_TABLES,
+        ("activity_closure_pkey", "ix_company_activity_activity_id_company_id") + COMPANY_LOAD_INDEXES
+    ),
+    Check(
+        "companies.by_name",
+        lambda db, s: CompanyService().search_companies_by_name(db, s.name_fragment, limit=20),
+        COMPANY_TABLES,
+        ("ix_companies_name_trgm",) + COMPANY_LOAD_INDEXES
+    ),
+    Check(
+        "companies.in_radius",
+        lambda db, s: CompanyService().get_companies_in_radius(db, s.latitude, s.longitude, 1.0, limit=20),
+        COMPANY_TABLES + ("buildings",),
+        ("ix_buildings_latitude_longitude", "ix_companies_building_id") + COMPANY_LOAD_INDEXES
+    ),
+    Check(
+        "companies.in_rectangle",
+        lambda db, s: CompanyService().get_companies_in_rectangle(
+            db, s.latitude - 0.01, s.latitude + 0.01, s.longitude - 0.01, s.longitude + 0.01, limit=20
+        ),
+        COMPANY_TABLES + ("buildings",),
+        ("ix_buildings_latitude_longitude", "ix_companies_building_id") + COMPANY_LOAD_INDEXES
+    ),
+    Check(
+        "companies.search",
+        lambda db, s: CompanyService().search_companies(db, CompanySearch(
+            lat=s.latitude, lng=s.longitude, radius=2.0, activity_id=s.activity_id, name=s.name_fragment
+        ), limit=20),
+        COMPANY_TABLES + ("buildings",),
+        ("ix_buildings_latitude_longitude", "ix_companies_building_id", "activity_closure_pkey")
+    ),
+    Check(
+        "activities.children",
+        lambda db, s: db.execute(
+            select(Activity).options(selectinload(Activity.children)).where(Activity.id == s.activity_id)
+        ),
+        ("activities",),
+        ("ix_activities_id", "ix_activities_parent_id")
+    ),
+    Check(
+        "activities.level",
+        lambda db, s: ActivityService.get_activity_level(db, s.activity_id),
+        ("activity_closure",),
+        ("ix_activity_closure_descendant_id",)
+    ),
+    Check(
+        "activities.subtree_height",
+        lambda db, s: ActivityService.get_subtree_height(db, s.activity_id),
+        ("activity_closure",),
+        ("activity_closure_pkey",)
+    ),
+]
+
+
+def plan_nodes(node: Dict) -> Iterator[Dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+async def capture_statements(db: AsyncSession, check: Check, sample: Sample) -> List[tuple]:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        await check.run(db, sample)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    return statements
+
+
+async def run_check(db: AsyncSession, check: Check, sample: Sample, natural: bool) -> List[str]:
+    """Возвращает описания полных сканирований таблиц проверки и неиспользованных индексов"""
+    problems = []
+    used_indexes = set()
+    connection = await db.connection()
+    for statement, parameters in await capture_statements(db, check, sample):
+        if not natural:
+            await db.execute(text("SET LOCAL enable_seqscan = off"))
+        result = await connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        query = " ".join(statement.split())[:200]
+        for node in plan_nodes(plan[0]["Plan"]):
+            relation = node.get("Relation Name")
+            if "Index Cond" in node:
+                used_indexes.add(node["Index Name"])
+            elif relation not in check.tables:
+                continue
+            elif node["Node Type"] == "Seq Scan":
+                problems.append(f"Seq Scan on {relation}: {query}")
+            elif node["Node Type"] in ("Index Scan", "Index Only Scan"):
+                problems.append(f"Full scan of {node['Index Name']} on {relation}: {query}")
+    await db.rollback()
+    problems.extend(
+        f"Index {index} is not used with a condition"
+        for index in check.indexes if index not in used_indexes
+    )
+    return problems
+
+
+async def main(args) -> int:
+    if args.reset:
+        await reset_database(SeedParams(companies=args.companies, buildings=args.buildings))
+        # Без свежей статистики планировщик оценивает только что залитые таблицы наугад
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+
+    failed = 0
+    async with AsyncSessionLocal() as db:
+        sample = await Sample.load(db)
+        # Загрузка справочника целиком читает всю таблицу и к проверкам не относится
+        await taxonomy_cache.get(db)
+        for check in CHECKS:
+            if args.only and not any(part in check.name for part in args.only):
+                continue
+            problems = await run_check(db, check, sample, args.natural)
+            print(f"{'FAIL' if problems else 'ok':4} {check.name}")
+            for problem in problems:
+                print(f"     {problem}")
+            failed += bool(problems)
+    await engine.dispose()
+    return 1 if failed else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Проверка использования индексов горячими запросами")
+    parser.add_argument("--reset", action="store_true", help="пересоздать таблицы и заполнить данными")
+    parser.add_argument("--companies", type=int, default=10_000)
+    parser.add_argument("--buildings", type=int, default=1_000)
+    parser.add_argument("--natural", action="store_true", help="не запрещать планировщику Seq Scan")
+    parser.add_argument("--only", nargs="*", help="подстроки имён проверок")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
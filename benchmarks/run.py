@@ -0,0 +1,210 @@
+"""Нагрузочный прогон всех эндпоинтов приложения in-process через ASGI.
+
+    python -m benchmarks.run --reset --companies 100000 --concurrency 16 \\
+        --save benchmarks/results.json --baseline benchmarks/baseline.json
+
+База берётся из DATABASE_URL (или DB_*), --reset пересоздаёт таблицы и
+заполняет их генератором из run_mock. При сравнении с baseline прогон
+завершается с кодом 1, если p95 эндпоинта вырос больше чем на --tolerance
+или увеличилось число SQL-запросов на запрос.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import numpy as np
+from typing import Dict, List, Optional
+import httpx
+from sqlalchemy import event
+from app.config.config import SECRET_API_KEY
+from app.database.database import engine, Base, AsyncSessionLocal
+from app.database.run_mock import seed_data, SeedParams
+from app.fastapi_app import app
+from benchmarks.scenarios import Dataset, Scenario, SCENARIOS
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+async def reset_database(params: SeedParams):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    print("seed:", await seed_data(params), file=sys.stderr)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    data: Dataset,
+    counter: QueryCounter,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int
+) -> Optional[Dict[str, float]]:
+    rng = random.Random(f"{seed}:{scenario.name}")
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def send(measure: bool):
+        nonlocal errors
+        request = scenario.build(rng, data)
+        if request is None:
+            return
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(
+                request.method, request.url,
+                params=request.params, json=request.json, files=request.files
+            )
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            errors += 1
+        elif request.created:
+            data.remember(request.created, response.json()["id"])
+        if measure:
+            latencies.append(elapsed)
+
+    await asyncio.gather(*(send(False) for _ in range(warmup)))
+    queries_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(send(True) for _ in range(requests)))
+    wall = time.perf_counter() - started
+    if not latencies:
+        return None
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "rps": round(len(latencies) / wall, 1),
+        "queries_per_request": round((counter.count - queries_before) / len(latencies), 2),
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current["queries_per_request"] > previous["queries_per_request"]:
+            regressions.append(
+                f"{name}: queries/request {previous['queries_per_request']} -> {current['queries_per_request']}"
+            )
+    return regressions
+
+
+def print_table(results: Dict[str, dict]):
+    header = f"{'endpoint':32} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>8} {'queries':>8} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, row in results.items():
+        print(
+            f"{name:32} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} "
+            f"{row['rps']:>8} {row['queries_per_request']:>8} {row['errors']:>7}"
+        )
+
+
+async def main(args) -> int:
+    # Запись в лог на каждый запрос засоряла бы вывод и искажала замеры
+    logging.getLogger("app.queries").setLevel(logging.WARNING)
+    if args.reset:
+        await reset_database(SeedParams(
+            companies=args.companies, buildings=args.buildings, seed=args.seed
+        ))
+
+    await app.router.startup()
+    async with AsyncSessionLocal() as db:
+        data = await Dataset.load(db)
+
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if (args.writes or not scenario.writes)
+        and (not args.only or any(part in scenario.name for part in args.only))
+    ]
+
+    results = {}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://benchmark",
+        headers={"X-API-Key": SECRET_API_KEY or "", **({"Cache-Control": "no-cache"} if args.no_cache else {})},
+        timeout=None
+    ) as client:
+        for scenario in scenarios:
+            row = await run_scenario(
+                client, scenario, data, counter,
+                args.requests, args.concurrency, args.warmup, args.seed
+            )
+            if row:
+                results[scenario.name] = row
+                print(f"{scenario.name}: p95 {row['p95_ms']} ms", file=sys.stderr)
+
+    event.remove(engine.sync_engine, "before_cursor_execute", counter)
+    await app.router.shutdown()
+    await engine.dispose()
+    print_table(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump({
+                "meta": {
+                    "python": platform.python_version(),
+                    "concurrency": args.concurrency,
+                    "requests": args.requests,
+                    "companies": args.companies if args.reset else None,
+                    "buildings": args.buildings if args.reset else None,
+                    "seed": args.seed,
+                },
+                "endpoints": results
+            }, file, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["endpoints"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк эндпоинтов справочника")
+    parser.add_argument("--reset", action="store_true", help="пересоздать таблицы и заполнить данными")
+    parser.add_argument("--companies", type=int, default=10_000)
+    parser.add_argument("--buildings", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на эндпоинт")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--writes", action="store_true", help="включить изменяющие эндпоинты")
+    parser.add_argument("--no-cache", action="store_true", help="не отдавать ответы из кэша ответов")
+    parser.add_argument("--only", nargs="*", help="подстроки имён сценариев")
+    parser.add_argument("--save", help="файл для результатов в JSON")
+    parser.add_argument("--baseline", help="JSON предыдущего прогона для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимый рост p95")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,182 @@
+import random
+from uuid import uuid4
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.models.activity import Activity
+from app.database.models.building import Building
+from app.database.models.company import Company
+
+
+SAMPLE_SIZE = 1000
+
+
+@dataclass
+class Dataset:
+    """Выборка существующих строк, из которой сценарии берут параметры запросов"""
+    buildings: List[tuple]
+    activities: List[tuple]
+    companies: List[tuple]
+    created: Dict[str, List[int]] = field(default_factory=dict)
+
+    @classmethod
+    async def load(cls, db: AsyncSession) -> "Dataset":
+        async def sample(*columns):
+            result = await db.execute(select(*columns).order_by(func.random()).limit(SAMPLE_SIZE))
+            return result.all()
+
+        return cls(
+            buildings=await sample(Building.id, Building.address, Building.latitude, Building.longitude),
+            activities=await sample(Activity.id, Activity.name),
+            companies=await sample(Company.id, Company.name)
+        )
+
+    def remember(self, kind: str, item_id: int):
+        self.created.setdefault(kind, []).append(item_id)
+
+    def take(self, kind: str) -> Optional[int]:
+        items = self.created.get(kind)
+        return items.pop() if items else None
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    params: Optional[Dict[str, Any]] = None
+    json: Any = None
+    files: Any = None
+    created: Optional[str] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[random.Random, Dataset], Optional[Request]]
+    writes: bool = False
+
+
+def get(url: str, **params) -> Request:
+    return Request("GET", url, params=params or None)
+
+
+def point(rng: random.Random, data: Dataset):
+    _, _, lat, lng = rng.choice(data.buildings)
+    return lat, lng
+
+
+def building_payload() -> Dict[str, Any]:
+    return {"address": f"bench {uuid4().hex}", "latitude": 55.75, "longitude": 37.62}
+
+
+def company_payload(rng: random.Random, data: Dataset) -> Dict[str, Any]:
+    return {
+        "name": f"bench {uuid4().hex[:8]}",
+        "building_id": rng.choice(data.buildings)[0],
+        "phone_numbers": ["+7-900-000-00-00"],
+        "activity_ids": [rng.choice(data.activities)[0]]
+    }
+
+
+def rectangle(rng: random.Random, data: Dataset) -> str:
+    lat, lng = point(rng, data)
+    return f"lat_min={lat - 0.02}&lat_max={lat + 0.02}&lng_min={lng - 0.04}&lng_max={lng + 0.04}"
+
+
+def import_file(rng: random.Random, data: Dataset):
+    lines = ["name,building_id,activity_ids,phone_numbers"]
+    lines += [
+        f"bench import {uuid4().hex[:8]},{rng.choice(data.buildings)[0]},{rng.choice(data.activities)[0]},+7-900"
+        for _ in range(20)
+    ]
+    return {"file": ("bench.csv", "\n".join(lines).encode())}
+
+
+def delete_created(kind: str, prefix: str):
+    def build(rng: random.Random, data: Dataset):
+        item_id = data.take(kind)
+        return None if item_id is None else Request("DELETE", f"{prefix}/{item_id}")
+    return build
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("activities.tree", lambda rng, data: get("/activities/get_activities_tree")),
+    Scenario("activities.list", lambda rng, data: get("/activities/?limit=100")),
+    Scenario("activities.get", lambda rng, data: get(f"/activities/{rng.choice(data.activities)[0]}")),
+    Scenario("buildings.list", lambda rng, data: get("/buildings/?limit=100")),
+    Scenario("buildings.get", lambda rng, data: get(f"/buildings/{rng.choice(data.buildings)[0]}")),
+    Scenario("buildings.by_address", lambda rng, data: get(
+        "/buildings/search/address", address=rng.choice(data.buildings)[1]
+    )),
+    Scenario("companies.list", lambda rng, data: get("/companies/?limit=100")),
+    Scenario("companies.get", lambda rng, data: get(f"/companies/{rng.choice(data.companies)[0]}")),
+    Scenario("companies.by_building", lambda rng, data: get(
+        f"/companies/building/{rng.choice(data.buildings)[0]}?limit=100"
+    )),
+    Scenario("companies.by_activity", lambda rng, data: get(
+        f"/companies/activity/{rng.choice(data.activities)[0]}?limit=100"
+    )),
+    Scenario("companies.radius", lambda rng, data: get(
+        "/companies/search/location/radius?lat={}&lng={}&radius=1&limit=100".format(*point(rng, data))
+    )),
+    Scenario("companies.nearest", lambda rng, data: get(
+        "/companies/search/location/nearest?lat={}&lng={}&limit=20".format(*point(rng, data))
+    )),
+    Scenario("companies.rectangle", lambda rng, data: get(
+        f"/companies/search/location/rectangle?{rectangle(rng, data)}&limit=100"
+    )),
+    Scenario("companies.search_activity", lambda rng, data: get(
+        "/companies/search/activity", activity_name=rng.choice(data.activities)[1], limit=100
+    )),
+    Scenario("companies.search_name", lambda rng, data: get(
+        "/companies/search/name", name=rng.choice(data.companies)[1][:6], limit=20
+    )),
+    Scenario("companies.search", lambda rng, data: get(
+        "/companies/search", **dict(zip(("lat", "lng"), point(rng, data))), radius=2,
+        activity_id=rng.choice(data.activities)[0], name=rng.choice(data.companies)[1][:4], limit=20
+    )),
+    Scenario("companies.search_facets", lambda rng, data: get(
+        "/companies/search/facets", **dict(zip(("lat", "lng"), point(rng, data))), radius=2
+    )),
+    Scenario("companies.clusters", lambda rng, data: get(
+        f"/companies/search/location/clusters?{rectangle(rng, data)}&zoom={rng.randint(8, 14)}"
+    )),
+
+    Scenario("buildings.create", lambda rng, data: Request(
+        "POST", "/buildings/", json=building_payload(), created="buildings"
+    ), writes=True),
+    Scenario("buildings.update", lambda rng, data: Request(
+        "PUT", f"/buildings/{rng.choice(data.created.get('buildings') or [data.buildings[0][0]])}",
+        json={"latitude": rng.uniform(55.6, 55.9)}
+    ), writes=True),
+    Scenario("buildings.bulk_create", lambda rng, data: Request(
+        "POST", "/buildings/bulk", json=[building_payload() for _ in range(50)]
+    ), writes=True),
+    Scenario("buildings.bulk_upsert", lambda rng, data: Request(
+        "PUT", "/buildings/bulk", json=[building_payload() for _ in range(50)]
+    ), writes=True),
+    Scenario("activities.create", lambda rng, data: Request(
+        "POST", "/activities/", json={"name": f"bench {uuid4().hex[:8]}"}, created="activities"
+    ), writes=True),
+    Scenario("activities.update", lambda rng, data: Request(
+        "PUT", f"/activities/{rng.choice(data.created.get('activities') or [data.activities[0][0]])}",
+        json={"name": f"bench {uuid4().hex[:8]}"}
+    ), writes=True),
+    Scenario("companies.create", lambda rng, data: Request(
+        "POST", "/companies/", json=company_payload(rng, data), created="companies"
+    ), writes=True),
+    Scenario("companies.update", lambda rng, data: Request(
+        "PUT", f"/companies/{rng.choice(data.companies)[0]}",
+        json={"phone_numbers": ["+7-900-111-11-11"]}
+    ), writes=True),
+    Scenario("companies.import", lambda rng, data: Request(
+        "POST", "/companies/import", files=import_file(rng, data)
+    ), writes=True),
+    Scenario("companies.delete", delete_created("companies", "/companies"), writes=True),
+    Scenario("activities.delete", delete_created("activities", "/activities"), writes=True),
+    Scenario("buildings.delete", delete_created("buildings", "/buildings"), writes=True),
+    Scenario("buildings.bulk_delete", lambda rng, data: Request(
+        "DELETE", "/buildings/bulk", json=[data.take("buildings") or 0 for _ in range(5)]
+    ), writes=True),
+]